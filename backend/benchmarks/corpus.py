@@ -0,0 +1,87 @@
+import random
+from typing import Dict, List
+
+ENTITIES = {
+    "Barack Obama": "DBpedia:Person",
+    "Angela Merkel": "DBpedia:Person",
+    "Marie Curie": "DBpedia:Person",
+    "Paris": "DBpedia:Place",
+    "Bucharest": "DBpedia:Place",
+    "Tokyo": "DBpedia:Place",
+    "United Nations": "DBpedia:Organisation",
+    "European Union": "DBpedia:Organisation",
+    "World Health Organization": "DBpedia:Organisation",
+    "Hamlet": "DBpedia:Work",
+    "Panthera leo": "DBpedia:Species",
+    "Olympic Games": "DBpedia:Event",
+}
+
+WORDS = (
+    "climate election market energy health science football policy research budget "
+    "technology border summit vaccine festival transport housing education water storm "
+    "court museum startup satellite harvest tourism bank strike reform drought"
+).split()
+
+LANGUAGES = ["en", "en", "en", "ro", "fr", "de", "es"]
+PUBLICATIONS = ["Daily Ledger", "Morning Wire", "Evening Post", "Global Desk", "City Herald"]
+DERIVATION_TYPES = ["Translation", "Revision", "Derivation"]
+
+def entity_uri(name: str) -> str:
+    return "http://dbpedia.org/resource/" + name.replace(" ", "_")
+
+def _zipf_choice(rng: random.Random, items: List[str]) -> str:
+    return items[min(int(rng.paretovariate(1.2)) - 1, len(items) - 1)]
+
+def generate_article(rng: random.Random, index: int, sources: List[str]) -> Dict:
+    keywords = sorted({_zipf_choice(rng, WORDS) for _ in range(rng.randint(1, 5))})
+    entities = rng.sample(list(ENTITIES), rng.randint(0, 3))
+    sentences = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+        for _ in range(rng.randint(3, 8))
+    ]
+    content = ". ".join(sentences + [f"Reported near {name}" for name in entities]) + "."
+
+    article = {
+        "title": f"{' '.join(keywords).title()} update {index}",
+        "author": f"Author {rng.randint(1, 200)}",
+        "publication": rng.choice(PUBLICATIONS),
+        "language": rng.choice(LANGUAGES),
+        "content": content,
+        "keywords": keywords,
+        "image_urls": [f"https://media.example.org/img/{index}/{n}.jpg" for n in range(rng.randint(0, 3))],
+        "video_urls": [f"https://media.example.org/video/{index}.mp4"] if rng.random() < 0.1 else [],
+        "audio_urls": [f"https://media.example.org/audio/{index}.mp3"] if rng.random() < 0.05 else [],
+        "dbpedia_entities": [entity_uri(name) for name in entities],
+        "wikidata_entities": [],
+        "enrichment_status": "completed",
+    }
+    if rng.random() < 0.3:
+        article["url"] = f"https://source.example.org/story/{index}"
+    if sources and rng.random() < 0.25:
+        article["based_on_article_id"] = rng.choice(sources[-50:])
+        article["derivation_type"] = rng.choice(DERIVATION_TYPES)
+    return article
+
+def load_corpus(fuseki_service, size: int, seed: int = 42, batch_size: int = 1000) -> List[str]:
+    rng = random.Random(seed)
+    article_ids = []
+    chunk = []
+    for index in range(size):
+        triples, article = fuseki_service._article_insert(generate_article(rng, index, article_ids))
+        article_ids.append(article["id"])
+        chunk.append(triples)
+        if len(chunk) >= batch_size or index == size - 1:
+            if not fuseki_service._insert_data("\n".join(chunk)):
+                raise RuntimeError("Corpus load failed")
+            chunk = []
+    return article_ids
+
+def generate_records(size: int, seed: int = 7) -> List[Dict]:
+    rng = random.Random(seed)
+    records = []
+    for index in range(size):
+        article = generate_article(rng, index, [])
+        for key in ("dbpedia_entities", "wikidata_entities", "enrichment_status"):
+            article.pop(key)
+        records.append(article)
+    return records
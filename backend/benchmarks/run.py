@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import WORDS, load_corpus, generate_records
+
+SCENARIOS = ["list", "detail", "search", "statistics", "recommendations", "validation", "ingest"]
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+def percentile(latencies: List[float], p: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def measure(name: str, size: int, iterations: int, call: Callable[[int], int], items_per_call: int = 1) -> Dict:
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        status = call(i)
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors += 1
+    total = time.perf_counter() - started
+
+    result = {
+        "size": size,
+        "scenario": name,
+        "iterations": iterations,
+        "errors": errors,
+        "total_s": round(total, 4),
+        "throughput_per_s": round(iterations / total, 2) if total else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+    if items_per_call > 1:
+        result["items_per_s"] = round(iterations * items_per_call / total, 2) if total else None
+    return result
+
+def run_size(size: int, iterations: int, scenarios: List[str], upstream_delay: float,
+             ingest_batch: int, ingest_iterations: int, seed: int) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="wep-bench-")
+    os.environ["ENRICHMENT_CACHE_PATH"] = os.path.join(workdir, "enrichment_cache.sqlite3")
+    os.environ["RECOMMENDATION_REFRESH_SECONDS"] = "0"
+    os.environ["STORAGE_BACKEND"] = "embedded"
+    os.environ["EMBEDDED_STORE_PATH"] = ":memory:"
+
+    from fastapi.testclient import TestClient
+    from benchmarks.stubs import StubUpstreamClient
+    import main
+
+    main.dbpedia_service.client = StubUpstreamClient(upstream_delay)
+
+    start = time.perf_counter()
+    article_ids = load_corpus(main.fuseki_service, size, seed)
+    corpus_load = time.perf_counter() - start
+    triples = len(main.storage)
+
+    rng = random.Random(seed)
+    results = []
+    start = time.perf_counter()
+    with TestClient(main.app) as client:
+        startup = time.perf_counter() - start
+
+        def sample_ids(count: int) -> List[str]:
+            if count <= len(article_ids):
+                return rng.sample(article_ids, count)
+            return [rng.choice(article_ids) for _ in range(count)]
+
+        cursor = {"value": None}
+
+        def list_page(i: int) -> int:
+            params = {"limit": 20}
+            if cursor["value"]:
+                params["cursor"] = cursor["value"]
+            response = client.get("/api/articles", params=params)
+            cursor["value"] = response.json().get("next_cursor") if response.status_code == 200 else None
+            return response.status_code
+
+        detail_ids = sample_ids(iterations)
+
+        def detail(i: int) -> int:
+            main.response_cache.invalidate(detail_ids[i])
+            return client.get(f"/api/articles/{detail_ids[i]}").status_code
+
+        queries = [" ".join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(iterations)]
+        recommendation_ids = sample_ids(iterations)
+        validation_ids = sample_ids(iterations)
+        records = generate_records(ingest_iterations * ingest_batch, seed + 1)
+
+        calls = {
+            "list": (list_page, 1),
+            "detail": (detail, 1),
+            "search": (lambda i: client.get("/api/search", params={"q": queries[i]}).status_code, 1),
+            "statistics": (lambda i: client.get("/api/statistics").status_code, 1),
+            "recommendations": (
+                lambda i: client.get(f"/api/articles/{recommendation_ids[i]}/recommendations").status_code, 1
+            ),
+            "validation": (lambda i: client.get(f"/api/articles/{validation_ids[i]}/validate").status_code, 1),
+            "ingest": (
+                lambda i: client.post(
+                    "/api/articles/bulk", json=records[i * ingest_batch:(i + 1) * ingest_batch]
+                ).status_code,
+                ingest_batch
+            ),
+        }
+
+        for name in scenarios:
+            call, items = calls[name]
+            count = ingest_iterations if name == "ingest" else iterations
+            results.append(measure(name, size, count, call, items))
+            print(f"[{size}] {name}: p50={results[-1]['p50_ms']}ms p99={results[-1]['p99_ms']}ms", file=sys.stderr)
+
+    return {
+        "setup": {"size": size, "triples": triples, "corpus_load_s": round(corpus_load, 3),
+                  "startup_s": round(startup, 3)},
+        "results": results
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+def print_table(report: Dict):
+    print(f"{'size':>8} {'scenario':<16} {'iter':>6} {'err':>4} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10}", file=sys.stderr)
+    for r in report["results"]:
+        print(f"{r['size']:>8} {r['scenario']:<16} {r['iterations']:>6} {r['errors']:>4} "
+              f"{r['throughput_per_s']:>10} {r['p50_ms']:>10} {r['p99_ms']:>10}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WeP API against an in-process SPARQL store")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--upstream-delay", type=float, default=0.0,
+                        help="Seconds of simulated latency for stubbed Spotlight/DBpedia/Wikidata calls")
+    parser.add_argument("--ingest-batch", type=int, default=50)
+    parser.add_argument("--ingest-iterations", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        report = run_size(args.sizes[0], args.iterations, args.scenarios, args.upstream_delay,
+                          args.ingest_batch, args.ingest_iterations, args.seed)
+        with open(args.output, "w") as f:
+            json.dump(report, f)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "config": {
+            "iterations": args.iterations,
+            "upstream_delay": args.upstream_delay,
+            "ingest_batch": args.ingest_batch,
+            "ingest_iterations": args.ingest_iterations,
+            "seed": args.seed,
+        },
+        "setup": [],
+        "results": []
+    }
+
+    # each size runs in a fresh interpreter so module-level services and indexes start empty
+    for size in args.sizes:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            worker_output = f.name
+        command = [
+            sys.executable, "-m", "benchmarks.run", "--worker",
+            "--sizes", str(size),
+            "--iterations", str(args.iterations),
+            "--scenarios", *args.scenarios,
+            "--upstream-delay", str(args.upstream_delay),
+            "--ingest-batch", str(args.ingest_batch),
+            "--ingest-iterations", str(args.ingest_iterations),
+            "--seed", str(args.seed),
+            "--output", worker_output
+        ]
+        subprocess.run(command, check=True, stdout=sys.stderr)
+        with open(worker_output) as f:
+            size_report = json.load(f)
+        os.unlink(worker_output)
+        report["setup"].append(size_report["setup"])
+        report["results"].extend(size_report["results"])
+
+    print_table(report)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
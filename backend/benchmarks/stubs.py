@@ -0,0 +1,64 @@
+import io
+import re
+import json
+import time
+import zlib
+from typing import Dict, Any
+
+from benchmarks.corpus import ENTITIES, entity_uri
+
+class LocalResponse:
+    def __init__(self, body: bytes, status_code: int = 200):
+        self.status_code = status_code
+        self.content = body
+        self.encoding = "utf-8"
+        self.raw = io.BytesIO(body)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding)
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def close(self):
+        self.raw.close()
+
+class StubUpstreamSession:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+
+    def post(self, url: str, data: Dict = None, headers: Dict = None, timeout: float = None) -> LocalResponse:
+        time.sleep(self.delay)
+        text = (data or {}).get("text", "")
+        resources = [
+            {"@URI": entity_uri(name), "@types": types, "@surfaceForm": name}
+            for name, types in ENTITIES.items() if name in text
+        ]
+        return LocalResponse(json.dumps({"Resources": resources}).encode("utf-8"))
+
+    def close(self):
+        pass
+
+class StubUpstreamClient:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.session = StubUpstreamSession(delay)
+
+    def query(self, endpoint: str, query: str, timeout: float = None) -> Dict[str, Any]:
+        time.sleep(self.delay)
+        bindings = []
+        if "owl:sameAs" in query:
+            for uri in re.findall(r"<(http://dbpedia\.org/resource/[^>]+)>", query):
+                bindings.append({
+                    "entity": {"type": "uri", "value": uri},
+                    "wikidata": {"type": "uri", "value": f"http://www.wikidata.org/entity/Q{zlib.crc32(uri.encode()) % 100000}"}
+                })
+        return {"head": {"vars": ["entity", "wikidata"]}, "results": {"bindings": bindings}}
+
+    def close(self):
+        pass
@@ -1,17 +1,34 @@
 import os
+import time
+import json
+import threading
 import uvicorn
 from dotenv import load_dotenv
 from typing import List
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from SPARQLWrapper import SPARQLWrapper, JSON
+from fastapi.responses import StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
 
+from services.sparql_client import SPARQLClient, AsyncSPARQLClient
+from services.storage import create_storage
 from services.fuseki_service import FusekiService
+from services.async_fuseki_service import AsyncFusekiService
 from services.dbpedia_service import DBpediaService
-from services.qr_service import QRCodeService
-from services.shacl_service import SHACLService
-from services.recommendation_service import RecommendationService
-from models.article import Article, ArticleCreate
+from services.qr_service import QRCodeService, QRSheetRenderer, SHEET_MEDIA_TYPES
+from services.shacl_service import SHACLService, DatasetValidator
+from services.recommendation_service import RecommendationIndex
+from services.search_service import SearchIndex
+from services.statistics_service import StatisticsIndex
+from services.lineage_service import LineageIndex
+from services.sparql_proxy import SPARQLProxy
+from services.export_service import DatasetExporter
+from services.metrics_service import metrics
+from services.resilience import BREAKER_STATES
+from services.enrichment_service import EnrichmentQueue
+from services.response_cache import ResponseCache
+from services.ingestion_service import BulkIngestor
+from models.article import Article, ArticleCreate, ArticleUpdate, RecommendationBatchRequest, ArticleBatchRequest, QRSheetRequest
 
 load_dotenv()
 
@@ -26,27 +43,193 @@ app.add_middleware(
 )
 
 fuseki_url = os.getenv("FUSEKI_URL", "http://fuseki:3030")
-fuseki_service = FusekiService(fuseki_url)
-dbpedia_service = DBpediaService()
+sparql_client = SPARQLClient()
+async_sparql_client = AsyncSPARQLClient()
+storage, async_storage = create_storage(fuseki_url, sparql_client, async_sparql_client)
+fuseki_service = FusekiService(storage)
+dbpedia_service = DBpediaService(sparql_client)
+async_fuseki_service = AsyncFusekiService(fuseki_service, async_storage)
+recommendation_index = RecommendationIndex()
+search_index = SearchIndex()
+statistics_index = StatisticsIndex()
+lineage_index = LineageIndex(fuseki_service.namespace)
+response_cache = ResponseCache()
+enrichment_queue = EnrichmentQueue(dbpedia_service, fuseki_service, on_update=response_cache.invalidate)
+bulk_ingestor = BulkIngestor(dbpedia_service, fuseki_service, enrichment_queue)
+dataset_validator = DatasetValidator(fuseki_service)
+sparql_proxy = SPARQLProxy(fuseki_service)
+dataset_exporter = DatasetExporter(fuseki_service)
+qr_service = QRCodeService()
+qr_sheet_renderer = QRSheetRenderer(qr_service)
+multi_get_max_ids = int(os.getenv("MULTI_GET_MAX_IDS", "200"))
+articles_max_page = int(os.getenv("ARTICLES_MAX_PAGE", "1000"))
+search_max_limit = int(os.getenv("SEARCH_MAX_LIMIT", "100"))
+index_retry_seconds = float(os.getenv("INDEX_RETRY_SECONDS", "15"))
+index_build_lock = threading.Lock()
+index_build_stop = threading.Event()
+
+metrics.collect("wep_cache_hits_total", lambda: {(("cache", "response"),): response_cache.hits})
+metrics.collect("wep_cache_misses_total", lambda: {(("cache", "response"),): response_cache.misses})
+metrics.collect("wep_cache_hits_total", lambda: {(("cache", "qrcode"),): qr_service._render.cache_info().hits})
+metrics.collect("wep_cache_misses_total", lambda: {(("cache", "qrcode"),): qr_service._render.cache_info().misses})
+metrics.gauge(
+    "wep_upstream_circuit_state",
+    "Upstream circuit breaker state (0 closed, 1 half open, 2 open).",
+    lambda: {(("upstream", name),): BREAKER_STATES[state["state"]] for name, state in dbpedia_service.circuit_states().items()}
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        metrics.observe("wep_http_request_duration_seconds", time.perf_counter() - start, route=path, method=request.method)
+        metrics.inc("wep_http_requests_total", route=path, method=request.method, status=str(status))
+
+def _build_indexes() -> bool:
+    with index_build_lock:
+        if recommendation_index.built and search_index.built and lineage_index.built:
+            return True
+        try:
+            all_articles = fuseki_service.get_articles()
+            if not recommendation_index.built:
+                recommendation_index.build(all_articles)
+            if not search_index.built:
+                search_index.build(all_articles)
+            if not lineage_index.built:
+                lineage_index.build(fuseki_service.get_lineage_rows(), all_articles)
+            print(f"Recommendation, search and lineage indexes built with {len(all_articles)} articles")
+            return True
+        except Exception as e:
+            print(f"Index build failed: {e}")
+            return False
+
+def _retry_index_build():
+    # the store is often still starting when the app comes up, keep trying until it answers
+    while not index_build_stop.wait(index_retry_seconds):
+        if _build_indexes():
+            return
+
+@app.on_event("startup")
+def build_indexes():
+    if not _build_indexes():
+        threading.Thread(target=_retry_index_build, name="index-build", daemon=True).start()
+    
+    try:
+        statistics_index.rebuild(fuseki_service)
+    except Exception as e:
+        print(f"Statistics build skipped: {e}")
+    
+    refresh_interval = int(os.getenv("RECOMMENDATION_REFRESH_SECONDS", "0"))
+    if refresh_interval > 0:
+        recommendation_index.start_background_refresh(refresh_interval)
+    
+    if dbpedia_service.linker is not None:
+        # loads in the background, enrichment uses Spotlight until the gazetteer is ready
+        dbpedia_service.linker.start()
+    
+    enrichment_queue.start()
+    try:
+        resumed = enrichment_queue.resume_pending()
+        if resumed:
+            print(f"Resumed enrichment for {resumed} articles")
+    except Exception as e:
+        print(f"Pending enrichment scan skipped: {e}")
+
+@app.on_event("shutdown")
+async def close_sparql_clients():
+    index_build_stop.set()
+    enrichment_queue.stop()
+    bulk_ingestor.shutdown()
+    qr_sheet_renderer.shutdown()
+    dbpedia_service.shutdown()
+    await async_sparql_client.aclose()
+    sparql_client.close()
+    storage.close()
+
+def _cached_response(request: Request, entry, headers: dict = None) -> Response:
+    etag, body, media_type = entry
+    headers = headers or response_cache.headers(etag)
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def _invalidate_derivation_sources(article_data: dict):
+    if article_data.get("based_on_article_id"):
+        response_cache.invalidate(article_data["based_on_article_id"])
 
 @app.get("/")
 def root():
     return {"message": "WeP - Web News Provenance API", "version": "1.0.0"}
 
+@app.get("/metrics")
+def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
-def health_check():
-    fuseki_status = fuseki_service.check_connection()
+async def health_check():
+    fuseki_status = await async_fuseki_service.check_connection()
     return {
         "status": "healthy" if fuseki_status else "degraded",
+        "storage_backend": type(storage).__name__,
+        "storage_layout": fuseki_service.layout,
         "fuseki_url": fuseki_url,
-        "fuseki_connected": fuseki_status
+        "fuseki_connected": fuseki_status,
+        "upstreams": dbpedia_service.circuit_states(),
+        "entity_linker": dbpedia_service.linker_status()
     }
 
 @app.get("/api/articles")
-def get_articles():
+async def get_articles(limit: int = Query(None, ge=1, le=articles_max_page), cursor: str = None, format: str = "json", ids: str = None):
     try:
-        articles = fuseki_service.get_articles()
-        return {"articles": articles, "count": len(articles)}
+        if ids is not None:
+            return await _get_articles_by_ids(ids.split(","))
+        
+        if format == "ndjson":
+            articles = fuseki_service.iter_articles(limit, cursor)
+            return StreamingResponse(
+                (json.dumps(article) + "\n" for article in articles),
+                media_type="application/x-ndjson"
+            )
+        
+        articles = await async_fuseki_service.get_articles(limit, cursor)
+        next_cursor = None
+        if limit and len(articles) == limit:
+            next_cursor = fuseki_service.encode_cursor(articles[-1])
+        return {"articles": articles, "count": len(articles), "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _get_articles_by_ids(article_ids):
+    article_ids = list(dict.fromkeys(article_id.strip() for article_id in article_ids if article_id.strip()))
+    if not article_ids:
+        raise ValueError("No article ids given")
+    if len(article_ids) > multi_get_max_ids:
+        raise ValueError(f"At most {multi_get_max_ids} ids per request")
+    articles = await async_fuseki_service.get_articles_by_ids(article_ids)
+    found = {article["id"] for article in articles}
+    return {
+        "articles": articles,
+        "count": len(articles),
+        "missing": [article_id for article_id in article_ids if article_id not in found]
+    }
+
+@app.post("/api/articles/batch")
+async def get_articles_batch(request: ArticleBatchRequest):
+    try:
+        return await _get_articles_by_ids(request.ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -54,9 +237,15 @@ def get_articles():
 def create_article(article: ArticleCreate):
     try:
         article_dict = article.dict()
-        enriched_data = dbpedia_service.enrich_article(article_dict)
-        result = fuseki_service.create_article(enriched_data)
+        article_dict["enrichment_status"] = "pending"
+        result = fuseki_service.create_article(article_dict)
         if result:
+            recommendation_index.add_article(result)
+            search_index.add_article(result)
+            statistics_index.add_article(result)
+            lineage_index.add_article(result)
+            _invalidate_derivation_sources(article_dict)
+            enrichment_queue.submit(result["id"], article_dict)
             return result
         raise HTTPException(status_code=500, detail="Failed to create article")
     except Exception as e:
@@ -65,115 +254,320 @@ def create_article(article: ArticleCreate):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _iter_bulk_records(request: Request):
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+    else:
+        records = await request.json()
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of articles")
+        for record in records:
+            yield record
+
+@app.post("/api/articles/bulk")
+async def create_articles_bulk(request: Request, enrich: bool = True):
+    try:
+        report = []
+        batch = []
+        
+        async def flush():
+            batch_report, articles = await run_in_threadpool(bulk_ingestor.ingest_batch, list(batch), enrich)
+            for _, article_data in batch:
+                _invalidate_derivation_sources(article_data)
+            for created in articles:
+                recommendation_index.add_article(created)
+                search_index.add_article(created)
+                statistics_index.add_article(created)
+                lineage_index.add_article(created)
+            report.extend(batch_report)
+            batch.clear()
+        
+        index = 0
+        async for record in _iter_bulk_records(request):
+            try:
+                if isinstance(record, bytes):
+                    record = json.loads(record)
+                batch.append((index, ArticleCreate(**record).dict()))
+            except Exception as e:
+                report.append({"index": index, "status": "failed", "error": str(e)})
+            index += 1
+            if len(batch) >= bulk_ingestor.batch_size:
+                await flush()
+        if batch:
+            await flush()
+        
+        report.sort(key=lambda r: r["index"])
+        succeeded = sum(1 for r in report if r["status"] == "created")
+        return {"total": index, "succeeded": succeeded, "failed": index - succeeded, "results": report}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/articles/{article_id}/enrichment")
+async def get_enrichment_status(article_id: str):
+    try:
+        status = enrichment_queue.get_status(article_id)
+        if status:
+            return status
+        article = await async_fuseki_service.get_article_with_provenance(article_id)
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+        return {"article_id": article_id, "status": article.get("enrichment_status", "completed")}
+    except HTTPException:
+        raise
+    except ValueError:
+        # an id that cannot be part of an article URI cannot name an existing article
+        raise HTTPException(status_code=404, detail="Article not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/articles/{article_id}/validate")
-def validate_article(article_id: str):
+async def validate_article(article_id: str, inference: str = None):
+    try:
+        SHACLService.check_inference(inference)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        rdf_data = fuseki_service.get_article_rdf(article_id, "turtle")
+        rdf_data = await async_fuseki_service.get_article_rdf(article_id, "turtle")
         if not rdf_data:
             raise HTTPException(status_code=404, detail="Article not found")
         
-        validation_result = SHACLService.validate_article_data(rdf_data)
+        validation_result = await run_in_threadpool(SHACLService.validate_article_data, rdf_data, inference)
         return validation_result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/articles/{article_id}")
-def get_article(article_id: str):
+async def get_article(article_id: str, request: Request):
     try:
-        article = fuseki_service.get_article_with_provenance(article_id)
-        if article:
-            return article
+        cached = response_cache.get(article_id, "article")
+        if not cached:
+            article = await async_fuseki_service.get_article_with_provenance(article_id)
+            if not article:
+                raise HTTPException(status_code=404, detail="Article not found")
+            cached = response_cache.set(article_id, "article", response_cache.encode_json(article), "application/json")
+        return _cached_response(request, cached)
+    except HTTPException:
+        raise
+    except ValueError:
         raise HTTPException(status_code=404, detail="Article not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/articles/{article_id}/recommendations")
-def get_recommendations(article_id: str):
+def _invalidate_article(article_id: str):
+    for related_id in [article_id] + lineage_index.neighbours(article_id):
+        response_cache.invalidate(related_id)
+
+@app.patch("/api/articles/{article_id}")
+def update_article(article_id: str, update: ArticleUpdate):
     try:
-        current_article = fuseki_service.get_article_with_provenance(article_id)
-        if not current_article:
-            raise HTTPException(status_code=404, detail="Article not found")
-        
-        all_articles = fuseki_service.get_articles()
+        changes = update.dict(exclude_unset=True)
+        editor = changes.pop("editor", None)
+        missing = [field for field, value in changes.items() if value is None]
+        if missing:
+            raise ValueError(f"Fields cannot be cleared: {', '.join(missing)}")
         
-        ml_recommendations = RecommendationService.get_ml_recommendations(
-            current_article, 
-            all_articles, 
-            limit=5
-        )
+        current = fuseki_service.get_article_with_provenance(article_id)
+        if not current:
+            raise HTTPException(status_code=404, detail="Article not found")
+        edit = fuseki_service.update_article(article_id, current, changes, editor)
+        if edit is None:
+            raise HTTPException(status_code=500, detail="Failed to update article")
         
-        return {"recommendations": ml_recommendations, "count": len(ml_recommendations), "method": "ML (TF-IDF + Cosine Similarity)"}
+        updated = {**current, **changes}
+        if edit["changed"]:
+            recommendation_index.remove_article(article_id)
+            recommendation_index.add_article(updated)
+            search_index.remove_article(current)
+            search_index.add_article(updated)
+            statistics_index.remove_article(current)
+            statistics_index.add_article(updated)
+            lineage_index.add_article(updated)
+            _invalidate_article(article_id)
+        return {**updated, "edit": edit}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/articles/{article_id}/jsonld")
-def get_article_jsonld(article_id: str):
+@app.delete("/api/articles/{article_id}")
+def delete_article(article_id: str, editor: str = None):
     try:
-        article = fuseki_service.get_article_with_provenance(article_id)
-        if not article:
+        current = fuseki_service.get_article_with_provenance(article_id)
+        if not current:
             raise HTTPException(status_code=404, detail="Article not found")
+        result = fuseki_service.delete_article(article_id, editor)
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to delete article")
         
-        provenance = fuseki_service.get_full_provenance_chain(article_id)
-        frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
-        
-        jsonld = {
-            "@context": "http://schema.org/",
-            "@type": "NewsArticle",
-            "@id": f"{frontend_url}/articles/{article_id}",
-            "headline": article["title"],
-            "articleBody": article["content"],
-            "author": {
-                "@type": "Person",
-                "name": article["author"]
-            },
-            "publisher": {
-                "@type": "Organization",
-                "name": article["publication"]
-            },
-            "inLanguage": article["language"],
-            "keywords": article.get("keywords", [])
-        }
-        
-        if article.get("image_urls"):
-            jsonld["image"] = article["image_urls"]
-        
-        if article.get("video_urls"):
-            jsonld["video"] = article["video_urls"]
-        
-        if article.get("audio_urls"):
-            jsonld["audio"] = article["audio_urls"]
+        enrichment_queue.cancel(article_id)
+        _invalidate_article(article_id)
+        recommendation_index.remove_article(article_id)
+        search_index.remove_article(current)
+        statistics_index.remove_article(current)
+        lineage_index.remove_article(article_id)
+        return {"id": article_id, "deleted": True, **result}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/articles/{article_id}/recommendations")
+def get_recommendations(article_id: str):
+    # indexing and scoring are CPU bound, a plain def keeps them off the event loop
+    try:
+        if not recommendation_index.built:
+            # keyword overlap from the store until the retried build has filled the index
+            recommendations = fuseki_service.get_recommendations(article_id)
+            return {"recommendations": recommendations, "count": len(recommendations), "method": "SPARQL keyword overlap"}
         
-        if provenance.get("derived_from"):
-            jsonld["isBasedOn"] = provenance["derived_from"]
+        if article_id not in recommendation_index:
+            current_article = fuseki_service.get_article_with_provenance(article_id)
+            if not current_article:
+                raise HTTPException(status_code=404, detail="Article not found")
+            recommendation_index.add_article(current_article)
         
-        if provenance.get("related_entities"):
-            jsonld["mentions"] = [
-                {"@type": "Thing", "@id": uri} 
-                for uri in provenance["related_entities"][:5]
-            ]
+        ml_recommendations = recommendation_index.get_recommendations(article_id, limit=5)
         
-        if provenance.get("wikidata_entities"):
-            jsonld["sameAs"] = provenance["wikidata_entities"]
+        return {"recommendations": ml_recommendations, "count": len(ml_recommendations), "method": "ML (TF-IDF + Cosine Similarity)"}
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Article not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/recommendations/batch")
+def get_batch_recommendations(request: RecommendationBatchRequest):
+    if len(request.article_ids) > multi_get_max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {multi_get_max_ids} ids per request")
+    try:
+        if not recommendation_index.built:
+            recommendations = {
+                article_id: fuseki_service.get_recommendations(article_id, limit=request.limit)
+                for article_id in request.article_ids
+            }
+            return {"recommendations": recommendations, "count": len(recommendations), "method": "SPARQL keyword overlap"}
         
-        return jsonld
+        recommendations = recommendation_index.get_batch_recommendations(request.article_ids, limit=request.limit)
+        return {"recommendations": recommendations, "count": len(recommendations), "method": "ML (TF-IDF + Cosine Similarity)"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/articles/{article_id}/rdf")
-def get_article_rdf(article_id: str, format: str = "turtle"):
+def _build_jsonld(article_id: str, article: dict, provenance: dict) -> dict:
+    frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
+    
+    jsonld = {
+        "@context": "http://schema.org/",
+        "@type": "NewsArticle",
+        "@id": f"{frontend_url}/articles/{article_id}",
+        "headline": article["title"],
+        "articleBody": article["content"],
+        "author": {
+            "@type": "Person",
+            "name": article["author"]
+        },
+        "publisher": {
+            "@type": "Organization",
+            "name": article["publication"]
+        },
+        "inLanguage": article["language"],
+        "keywords": article.get("keywords", [])
+    }
+    
+    if article.get("image_urls"):
+        jsonld["image"] = article["image_urls"]
+    
+    if article.get("video_urls"):
+        jsonld["video"] = article["video_urls"]
+    
+    if article.get("audio_urls"):
+        jsonld["audio"] = article["audio_urls"]
+    
+    if provenance.get("derived_from"):
+        jsonld["isBasedOn"] = provenance["derived_from"]
+    
+    if provenance.get("related_entities"):
+        jsonld["mentions"] = [
+            {"@type": "Thing", "@id": uri} 
+            for uri in provenance["related_entities"][:5]
+        ]
+    
+    if provenance.get("wikidata_entities"):
+        jsonld["sameAs"] = provenance["wikidata_entities"]
+    
+    return jsonld
+
+@app.get("/api/articles/{article_id}/jsonld")
+async def get_article_jsonld(article_id: str, request: Request):
     try:
-        rdf_data = fuseki_service.get_article_rdf(article_id, format)
-        if rdf_data:
-            return {"format": format, "data": rdf_data}
+        cached = response_cache.get(article_id, "jsonld")
+        if not cached:
+            article, provenance = await async_fuseki_service.get_article_and_provenance(article_id)
+            if not article:
+                raise HTTPException(status_code=404, detail="Article not found")
+            jsonld = _build_jsonld(article_id, article, provenance)
+            cached = response_cache.set(article_id, "jsonld", response_cache.encode_json(jsonld), "application/ld+json")
+        return _cached_response(request, cached)
+    except HTTPException:
+        raise
+    except ValueError:
         raise HTTPException(status_code=404, detail="Article not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/articles/{article_id}/rdf")
+async def get_article_rdf(article_id: str, request: Request, format: str = "turtle"):
+    try:
+        cached = response_cache.get(article_id, f"rdf:{format}")
+        if not cached:
+            rdf_data = await async_fuseki_service.get_article_rdf(article_id, format)
+            if not rdf_data:
+                raise HTTPException(status_code=404, detail="Article not found")
+            body = response_cache.encode_json({"format": format, "data": rdf_data})
+            cached = response_cache.set(article_id, f"rdf:{format}", body, "application/json")
+        return _cached_response(request, cached)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/export")
+def export_dataset(format: str = "nt", since: str = None, until: str = None, cursor: str = None):
+    try:
+        chunks = dataset_exporter.export(format, since, until, cursor)
+        return StreamingResponse(
+            chunks,
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{dataset_exporter.filename(format)}"'}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/sparql/query")
 def sparql_query_post(query: dict):
     try:
-        result = fuseki_service.execute_sparql(query.get("query", ""))
-        return result
+        chunks, media_type = sparql_proxy.execute(query.get("query", ""))
+        return StreamingResponse(chunks, media_type=media_type)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -188,21 +582,36 @@ def get_dbpedia_entity(uri: str):
 @app.get("/api/statistics")
 def get_statistics():
     try:
-        stats = fuseki_service.get_statistics()
-        return stats
+        if not statistics_index.built:
+            statistics_index.rebuild(fuseki_service)
+        return statistics_index.snapshot()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/statistics/rebuild")
+def rebuild_statistics():
+    try:
+        statistics_index.rebuild(fuseki_service)
+        return statistics_index.snapshot()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/search")
-def search_articles(q: str, language: str = None):
+def search_articles(q: str, language: str = None, limit: int = Query(20, ge=1, le=search_max_limit),
+                    offset: int = Query(0, ge=0)):
     try:
-        results = fuseki_service.search_articles(q, language)
-        return {"results": results, "count": len(results)}
+        if not search_index.built:
+            # the store answers until the retried build has filled the index
+            results = fuseki_service.search_articles(q, language, limit=limit, offset=offset)
+            return {"results": results, "count": len(results), "total": None, "offset": offset, "limit": limit}
+        ranked = search_index.search(q, language, limit=limit, offset=offset)
+        results = ranked["results"]
+        return {"results": results, "count": len(results), "total": ranked["total"], "offset": offset, "limit": limit}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/wikidata/label")
-def get_wikidata_label(uri: str):
+async def get_wikidata_label(uri: str):
     try:
         entity_id = uri.split('/')[-1]
         query = f"""
@@ -213,10 +622,8 @@ def get_wikidata_label(uri: str):
         LIMIT 1
         """
         
-        sparql = SPARQLWrapper("https://query.wikidata.org/sparql")
-        sparql.setQuery(query)
-        sparql.setReturnFormat(JSON)
-        result = sparql.query().convert()
+        with dbpedia_service.breakers["wikidata"].guard(), dbpedia_service._upstream("wikidata"):
+            result = await async_sparql_client.query(dbpedia_service.wikidata_endpoint, query, dbpedia_service.budget)
         
         bindings = result.get("results", {}).get("bindings", [])
         if bindings:
@@ -234,18 +641,72 @@ def search_wikidata(q: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/provenance/{article_id}")
-def get_provenance_chain(article_id: str):
+async def get_provenance_chain(article_id: str, request: Request):
     try:
-        chain = fuseki_service.get_full_provenance_chain(article_id)
-        return chain
+        cached = response_cache.get(article_id, "provenance")
+        if not cached:
+            chain = await async_fuseki_service.get_full_provenance_chain(article_id)
+            cached = response_cache.set(article_id, "provenance", response_cache.encode_json(chain), "application/json")
+        return _cached_response(request, cached)
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Article not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/provenance/{article_id}/lineage")
+async def get_provenance_lineage(article_id: str, depth: int = 10, limit: int = 500):
+    try:
+        # until the retried build lands the index only knows the articles fetched one by one
+        if not lineage_index.built or article_id not in lineage_index:
+            lineage_index.add_rows(await async_fuseki_service.get_lineage_rows(article_id))
+        lineage = lineage_index.lineage(article_id, depth, limit)
+        if lineage is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        return lineage
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/articles/{article_id}/qrcode")
-def get_article_qrcode(article_id: str):
+def get_article_qrcode(article_id: str, request: Request, format: str = "json"):
     try:
-        qr_info = QRCodeService.generate_qr_info(article_id)
-        return qr_info
+        if format != "json":
+            rendered = qr_service.render(article_id, format)
+            return _cached_response(request, rendered, QRCodeService.headers(rendered[0]))
+        
+        cached = response_cache.get(article_id, "qrcode")
+        if not cached:
+            qr_info = qr_service.generate_qr_info(article_id)
+            cached = response_cache.set(article_id, "qrcode", response_cache.encode_json(qr_info), "application/json")
+        return _cached_response(request, cached)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/qrcodes/sheet")
+def get_qrcode_sheet(request: QRSheetRequest):
+    article_ids = list(dict.fromkeys(request.article_ids))
+    if len(article_ids) > multi_get_max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {multi_get_max_ids} ids per request")
+    try:
+        articles = fuseki_service.get_articles_by_ids(article_ids) if article_ids else []
+        labels = {article["id"]: article["title"] for article in articles}
+        missing = [article_id for article_id in article_ids if article_id not in labels]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Articles not found: {', '.join(missing)}")
+        
+        body = qr_sheet_renderer.render_sheet(article_ids, labels, request.columns, request.format)
+        return Response(content=body, media_type=SHEET_MEDIA_TYPES[request.format])
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -258,6 +719,22 @@ def validate_rdf_data(data: dict):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/validate/dataset")
+def start_dataset_validation(inference: str = None):
+    try:
+        return dataset_validator.start(inference)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/validate/dataset/{job_id}")
+def get_dataset_validation(job_id: str):
+    job = dataset_validator.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Validation job not found")
+    return job
+
 @app.get("/api/shacl/shapes")
 def get_shacl_shapes():
     try:
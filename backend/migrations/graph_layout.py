@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import argparse
+from typing import List, Optional
+
+from services.storage import create_storage
+from services.fuseki_service import FusekiService
+from services.export_service import nt_term
+
+PENDING_FILTER = """
+        ?article a schema:NewsArticle .
+        FILTER NOT EXISTS { GRAPH ?article { ?article a schema:NewsArticle . } }"""
+
+def pending_articles_query(limit: int) -> str:
+    return f"""
+    PREFIX schema: <http://schema.org/>
+
+    SELECT ?article
+    WHERE {{{PENDING_FILTER}
+    }}
+    ORDER BY STR(?article)
+    LIMIT {int(limit)}
+    """
+
+def count_pending(fuseki_service: FusekiService) -> int:
+    query = f"""
+    PREFIX schema: <http://schema.org/>
+
+    SELECT (COUNT(?article) AS ?count)
+    WHERE {{{PENDING_FILTER}
+    }}
+    """
+    rows = list(fuseki_service._iter_rows(query, "migrate_pending"))
+    return int(rows[0]["count"]) if rows else 0
+
+def move_update(fuseki_service: FusekiService, article_ids: List[str]) -> Optional[str]:
+    # reads with the default layout return each article's own, activity and agent triples
+    graphs = {}
+    for binding in fuseki_service.iter_export_bindings(article_ids):
+        line = f"{nt_term(binding['s'])} {nt_term(binding['p'])} {nt_term(binding['o'])} ."
+        graphs.setdefault(binding["article"]["value"], []).append(line)
+    if not graphs:
+        return None
+
+    deletes = "\n".join(line for lines in graphs.values() for line in lines)
+    inserts = "\n".join(
+        f"GRAPH <{article_uri}> {{\n" + "\n".join(lines) + "\n}"
+        for article_uri, lines in graphs.items()
+    )
+    return f"DELETE DATA {{\n{deletes}\n}} ;\nINSERT DATA {{\n{inserts}\n}}"
+
+def migrate(fuseki_service: FusekiService, batch_size: int) -> int:
+    migrated = 0
+    while True:
+        rows = fuseki_service._iter_rows(pending_articles_query(batch_size), "migrate_pending")
+        article_ids = [row["article"].split("/")[-1] for row in rows]
+        if not article_ids:
+            return migrated
+        update = move_update(fuseki_service, article_ids)
+        if update is None or not fuseki_service.execute_update(update, "migrate_graph_layout"):
+            raise RuntimeError(f"Moving articles {article_ids[0]}..{article_ids[-1]} failed")
+        migrated += len(article_ids)
+        print(f"Moved {migrated} articles into named graphs", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move articles from the default graph into one named graph per article (STORAGE_LAYOUT=graph)"
+    )
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the articles that would be moved")
+    args = parser.parse_args()
+
+    storage, _ = create_storage(os.getenv("FUSEKI_URL", "http://fuseki:3030"))
+    # the articles still in the default graph are read with the default layout queries
+    fuseki_service = FusekiService(storage, layout="default")
+    if not fuseki_service.check_connection():
+        sys.exit("Store is not reachable")
+
+    start = time.perf_counter()
+    try:
+        if args.dry_run:
+            print(f"{count_pending(fuseki_service)} articles would be moved")
+            return
+        migrated = migrate(fuseki_service, args.batch_size)
+    finally:
+        storage.close()
+    print(f"Moved {migrated} articles in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class ArticleCreate(BaseModel):
     based_on_article_id: Optional[str] = None
@@ -17,6 +17,18 @@ class ArticleCreate(BaseModel):
     author: str
     title: str
 
+class ArticleUpdate(BaseModel):
+    keywords: Optional[List[str]] = None
+    image_urls: Optional[List[str]] = None
+    video_urls: Optional[List[str]] = None
+    audio_urls: Optional[List[str]] = None
+    language: Optional[str] = None
+    publication: Optional[str] = None
+    content: Optional[str] = None
+    author: Optional[str] = None
+    title: Optional[str] = None
+    editor: Optional[str] = None
+
 class Article(BaseModel):
     provenance_chain: Optional[List[dict]] = []
     dbpedia_entities: Optional[List[str]] = []
@@ -35,3 +47,15 @@ class Article(BaseModel):
     author: str
     title: str
     id: str
+
+class RecommendationBatchRequest(BaseModel):
+    article_ids: List[str] = Field(min_length=1)
+    limit: int = Field(5, ge=1, le=100)
+
+class ArticleBatchRequest(BaseModel):
+    ids: List[str]
+
+class QRSheetRequest(BaseModel):
+    article_ids: List[str]
+    columns: Optional[int] = None
+    format: str = "png"
@@ -0,0 +1,47 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.fuseki_service import FusekiService
+
+class AsyncFusekiService:
+    def __init__(self, fuseki_service: FusekiService, storage):
+        self.fuseki = fuseki_service
+        self.storage = storage
+    
+    async def check_connection(self) -> bool:
+        return await self.storage.ping()
+    
+    async def execute_sparql(self, query: str, name: str = "sparql_query") -> Dict[str, Any]:
+        with self.fuseki._timer(name):
+            return await self.storage.query(query)
+    
+    async def get_articles(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Dict]:
+        result = await self.execute_sparql(self.fuseki._articles_query(limit, cursor), "get_articles")
+        return list(self.fuseki._group_article_rows(self.fuseki._binding_values(result)))
+    
+    async def get_article_with_provenance(self, article_id: str) -> Dict:
+        result = await self.execute_sparql(self.fuseki._article_detail_query([article_id]), "get_article_detail")
+        return self.fuseki._shape_article_detail(article_id, result)[0]
+    
+    async def get_full_provenance_chain(self, article_id: str) -> Dict:
+        result = await self.execute_sparql(self.fuseki._article_detail_query([article_id], include_content=False), "get_provenance_chain")
+        return self.fuseki._shape_article_detail(article_id, result)[1]
+    
+    async def get_article_and_provenance(self, article_id: str) -> Tuple[Optional[Dict], Dict]:
+        result = await self.execute_sparql(self.fuseki._article_detail_query([article_id]), "get_article_detail")
+        return self.fuseki._shape_article_detail(article_id, result)
+    
+    async def get_articles_by_ids(self, article_ids: List[str]) -> List[Dict]:
+        result = await self.execute_sparql(self.fuseki._article_detail_query(article_ids), "get_articles_by_ids")
+        details = self.fuseki._shape_article_details(result)
+        return [details[article_id][0] for article_id in article_ids if article_id in details]
+    
+    async def get_lineage_rows(self, article_id: str = None) -> List[Dict]:
+        result = await self.execute_sparql(self.fuseki._lineage_query(article_id), "get_lineage")
+        return self.fuseki._binding_values(result)
+    
+    async def get_article_rdf(self, article_id: str, format: str = "turtle") -> str:
+        try:
+            with self.fuseki._timer("get_article_rdf"):
+                return await self.storage.construct(self.fuseki._article_rdf_query(article_id), format)
+        except Exception:
+            return None
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Optional
+
+class PersistentCache:
+    def __init__(self, path: str = None, max_entries: int = None, ttl: float = None):
+        self.path = path or os.getenv("ENRICHMENT_CACHE_PATH", "enrichment_cache.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("ENRICHMENT_CACHE_SIZE", "50000"))
+        self.ttl = ttl or float(os.getenv("ENRICHMENT_CACHE_TTL", str(7 * 24 * 3600)))
+        self.lock = threading.Lock()
+        self.writes = 0
+        # access times of hits, written in batches so a read does not pay for a commit
+        self.touched = {}
+        self.touch_batch = 100
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                # expired rows are deleted with the next eviction
+                return None
+            self.touched[key] = now
+            if len(self.touched) >= self.touch_batch:
+                self._flush_touched()
+                self.conn.commit()
+        return json.loads(row[0])
+
+    def _flush_touched(self):
+        if self.touched:
+            self.conn.executemany(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self.touched.items()]
+            )
+            self.touched = {}
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + (ttl or self.ttl), now)
+            )
+            self.writes += 1
+            if self.writes % 100 == 0:
+                self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now: float):
+        self._flush_touched()
+        self.conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        self.conn.execute("""
+            DELETE FROM cache WHERE key IN (
+                SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self._flush_touched()
+            self.conn.commit()
+            self.conn.close()
@@ -1,49 +1,131 @@
+import os
+import hashlib
 import requests
-from typing import Dict, List
-from SPARQLWrapper import SPARQLWrapper, JSON
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from services.sparql_client import SPARQLClient
+from services.cache_service import PersistentCache
+from services.metrics_service import metrics
+from services.resilience import CircuitBreaker, Deadline, hedged
+from services.entity_linker import ENTITY_TYPES, EntityLinker
+
+UPSTREAM_TIMEOUTS = (requests.exceptions.Timeout, TimeoutError)
 
 class DBpediaService:
-    def __init__(self):
+    def __init__(self, client: SPARQLClient = None, cache: PersistentCache = None):
+        self.client = client or SPARQLClient()
+        # an empty cache is falsy, it defines __len__
+        self.cache = cache if cache is not None else PersistentCache()
         self.dbpedia_endpoint = "http://dbpedia.org/sparql"
         self.wikidata_endpoint = "https://query.wikidata.org/sparql"
         self.spotlight_endpoint = "https://api.dbpedia-spotlight.org/en/annotate"
+        self.budget = float(os.getenv("ENRICHMENT_BUDGET_SECONDS", "8"))
+        self.hedge_delay = float(os.getenv("UPSTREAM_HEDGE_DELAY", "0"))
+        self.min_timeout = float(os.getenv("UPSTREAM_MIN_TIMEOUT", "0.5"))
+        self.breakers = {name: CircuitBreaker(name) for name in ("spotlight", "dbpedia", "wikidata")}
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="upstream-hedge")
+        self.linker_mode = os.getenv("ENTITY_LINKER", "spotlight")
+        self.linker = EntityLinker() if self.linker_mode == "local" else None
+    
+    def deadline(self) -> Deadline:
+        return Deadline(self.budget)
+    
+    def _call(self, upstream: str, breaker: str, call: Callable[[float], Any], timeout: float,
+              deadline: Optional[Deadline] = None) -> Any:
+        timeout = min(timeout, self.budget)
+        budget_timeout = deadline.timeout(timeout, self.min_timeout) if deadline else timeout
+        # a timeout the shared budget cut short says nothing about the upstream's health
+        ignore = UPSTREAM_TIMEOUTS if budget_timeout < timeout else ()
+        with self.breakers[breaker].guard(ignore), self._upstream(upstream):
+            return hedged(self.executor, lambda: call(budget_timeout), self.hedge_delay, budget_timeout, upstream)
+    
+    def linker_status(self) -> Dict:
+        if self.linker is None:
+            return {"mode": self.linker_mode}
+        return {"mode": self.linker_mode, **self.linker.status()}
+    
+    def circuit_states(self) -> Dict[str, Dict]:
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        # writes out the access times still batched in memory
+        self.cache.close()
+    
+    @staticmethod
+    def _upstream(name: str):
+        return metrics.timer("wep_upstream_duration_seconds", errors="wep_upstream_errors_total", upstream=name)
+    
+    def _cached(self, cache_name: str, key: str):
+        value = self.cache.get(key)
+        metrics.inc("wep_cache_hits_total" if value is not None else "wep_cache_misses_total", cache=cache_name)
+        return value
         
-    def enrich_article(self, article_data: Dict) -> Dict:
+    def enrich_article(self, article_data: Dict, strict: bool = False) -> Dict:
+        # one budget covers every upstream call made for the article
+        deadline = self.deadline()
         text = article_data.get("content", "") + " " + article_data.get("title", "")
-        entities = self.extract_entities(text)
+        entities = self.extract_entities(text, strict, deadline)
         article_data["dbpedia_entities"] = entities
         
         if entities:
-            wikidata_entities = self.get_wikidata_links(entities[:3])
+            wikidata_entities = self.get_wikidata_links(entities[:3], strict, deadline)
             article_data["wikidata_entities"] = wikidata_entities
         else:
             article_data["wikidata_entities"] = []
         
         return article_data
     
-    def extract_entities(self, text: str) -> List[str]:
+    def _annotate(self, text: str, timeout: float) -> Dict:
+        response = self.client.session.post(
+            self.spotlight_endpoint,
+            data={"text": text[:1000], "confidence": 0.3, "support": 10},
+            headers={"Accept": "application/json"},
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Spotlight returned HTTP {response.status_code}")
+        return response.json()
+    
+    @staticmethod
+    def _filter_types(resources: List[Dict]) -> List[str]:
+        entities = []
+        for r in resources[:15]:
+            uri = r["@URI"]
+            types = r.get("@types", "")
+            if any(t in types for t in ENTITY_TYPES):
+                entities.append(uri)
+        return entities
+    
+    def extract_entities(self, text: str, strict: bool = False, deadline: Optional[Deadline] = None) -> List[str]:
         if not text or len(text) < 20:
             return []
         
+        # Spotlight stands in while the gazetteer is still loading or failed to load
+        if self.linker is not None and self.linker.ready:
+            # the gazetteer is in-process, so the whole text is linked and nothing needs caching
+            try:
+                return self._filter_types(self.linker.annotate(text))
+            except Exception as e:
+                if strict:
+                    raise
+                print(f"Local entity linking failed: {e}")
+                return []
+        
+        cache_key = "spotlight:" + hashlib.sha1(text[:1000].encode("utf-8")).hexdigest()
+        cached = self._cached("spotlight", cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            response = requests.post(
-                self.spotlight_endpoint,
-                data={"text": text[:1000], "confidence": 0.3, "support": 10},
-                headers={"Accept": "application/json"},
-                timeout=5
-            )
-            if response.status_code == 200:
-                data = response.json()
-                resources = data.get("Resources", [])
-                entities = []
-                for r in resources[:15]:
-                    uri = r["@URI"]
-                    types = r.get("@types", "")
-                    if any(t in types for t in ["Person", "Place", "Organisation", "Work", "Species", "Event"]):
-                        entities.append(uri)
-                return entities
-        except:
-            pass
+            data = self._call("spotlight", "spotlight", lambda timeout: self._annotate(text, timeout), 5, deadline)
+            entities = self._filter_types(data.get("Resources", []))
+            self.cache.set(cache_key, entities)
+            return entities
+        except Exception:
+            if strict:
+                raise
         
         return []
     
@@ -57,40 +139,54 @@ class DBpediaService:
         """
         
         try:
-            sparql = SPARQLWrapper(self.dbpedia_endpoint)
-            sparql.setQuery(query)
-            sparql.setReturnFormat(JSON)
-            result = sparql.query().convert()
-            return result
-        except:
+            return self._call(
+                "dbpedia", "dbpedia",
+                lambda timeout: self.client.query(self.dbpedia_endpoint, query, timeout=timeout),
+                self.budget
+            )
+        except Exception:
             return {}
     
-    def get_wikidata_links(self, dbpedia_uris: List[str]) -> List[str]:
-        wikidata_entities = []
-        for uri in dbpedia_uris[:3]:
+    def get_wikidata_links(self, dbpedia_uris: List[str], strict: bool = False,
+                           deadline: Optional[Deadline] = None) -> List[str]:
+        uris = dbpedia_uris[:3]
+        mappings = {}
+        missing = []
+        for uri in uris:
+            cached = self._cached("sameas", "sameas:" + uri)
+            if cached is None:
+                missing.append(uri)
+            else:
+                mappings[uri] = cached
+        
+        if missing:
+            values = " ".join(f"<{uri}>" for uri in missing)
             query = f"""
             PREFIX owl: <http://www.w3.org/2002/07/owl#>
             
-            SELECT ?wikidata
+            SELECT ?entity ?wikidata
             WHERE {{
-                <{uri}> owl:sameAs ?wikidata .
+                VALUES ?entity {{ {values} }}
+                ?entity owl:sameAs ?wikidata .
                 FILTER(STRSTARTS(STR(?wikidata), "http://www.wikidata.org/"))
             }}
-            LIMIT 1
             """
             try:
-                sparql = SPARQLWrapper(self.dbpedia_endpoint)
-                sparql.setQuery(query)
-                sparql.setReturnFormat(JSON)
-                sparql.setTimeout(15)
-                result = sparql.query().convert()
-                bindings = result.get("results", {}).get("bindings", [])
-                if bindings:
-                    wikidata_entities.append(bindings[0]["wikidata"]["value"])
+                result = self._call(
+                    "dbpedia_sameas", "dbpedia",
+                    lambda timeout: self.client.query(self.dbpedia_endpoint, query, timeout=timeout),
+                    15, deadline
+                )
+                for binding in result.get("results", {}).get("bindings", []):
+                    mappings.setdefault(binding["entity"]["value"], binding["wikidata"]["value"])
+                for uri in missing:
+                    self.cache.set("sameas:" + uri, mappings.get(uri, ""))
             except Exception as e:
-                print(f"Wikidata lookup skipped for {uri.split('/')[-1]}")
+                if strict:
+                    raise
+                print(f"Wikidata lookup skipped for {', '.join(uri.split('/')[-1] for uri in missing)}")
         
-        return wikidata_entities
+        return [mappings[uri] for uri in uris if mappings.get(uri)]
     
     def search_wikidata(self, search_term: str) -> List[Dict]:
         query = f"""
@@ -105,10 +201,11 @@ class DBpediaService:
         """
         
         try:
-            sparql = SPARQLWrapper(self.wikidata_endpoint)
-            sparql.setQuery(query)
-            sparql.setReturnFormat(JSON)
-            result = sparql.query().convert()
+            result = self._call(
+                "wikidata", "wikidata",
+                lambda timeout: self.client.query(self.wikidata_endpoint, query, timeout=timeout),
+                self.budget
+            )
             return result.get("results", {}).get("bindings", [])
-        except:
+        except Exception:
             return []
@@ -0,0 +1,139 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from services.dbpedia_service import DBpediaService
+from services.fuseki_service import FusekiService
+
+class EnrichmentQueue:
+    def __init__(self, dbpedia_service: DBpediaService, fuseki_service: FusekiService,
+                 workers: int = None, max_retries: int = None, retry_delay: float = None,
+                 on_update: Optional[Callable[[str], None]] = None, max_status: int = None):
+        self.dbpedia = dbpedia_service
+        self.fuseki = fuseki_service
+        self.workers = workers or int(os.getenv("ENRICHMENT_WORKERS", "2"))
+        self.max_retries = max_retries or int(os.getenv("ENRICHMENT_MAX_RETRIES", "3"))
+        self.retry_delay = retry_delay or float(os.getenv("ENRICHMENT_RETRY_DELAY", "5"))
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        # finished jobs are forgotten oldest first, the store still has their enrichment status
+        self.status = OrderedDict()
+        self.max_status = max_status or int(os.getenv("ENRICHMENT_STATUS_MAX", "10000"))
+        self.threads = []
+        self.on_update = on_update
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"enrichment-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        self.threads = []
+
+    def submit(self, article_id: str, article_data: Dict):
+        with self.lock:
+            self.status[article_id] = {"article_id": article_id, "status": "pending", "attempts": 0, "error": None}
+            self.status.move_to_end(article_id)
+            self._trim()
+        self.jobs.put((article_id, {
+            "title": article_data.get("title", ""),
+            "content": article_data.get("content", "")
+        }))
+
+    def cancel(self, article_id: str):
+        with self.lock:
+            if article_id in self.status:
+                self.status[article_id]["status"] = "cancelled"
+
+    def resume_pending(self) -> int:
+        pending = self.fuseki.get_pending_enrichments()
+        for article in pending:
+            self.submit(article["id"], article)
+        return len(pending)
+
+    def get_status(self, article_id: str) -> Optional[Dict]:
+        with self.lock:
+            status = self.status.get(article_id)
+            return dict(status) if status else None
+
+    def _update_status(self, article_id: str, **fields):
+        with self.lock:
+            self.status.setdefault(article_id, {"article_id": article_id, "attempts": 0, "error": None}).update(fields)
+            self.status.move_to_end(article_id)
+            self._trim()
+
+    def _trim(self):
+        excess = len(self.status) - self.max_status
+        if excess <= 0:
+            return
+        finished = []
+        for article_id, status in self.status.items():
+            if status.get("status") in ("completed", "failed", "cancelled"):
+                finished.append(article_id)
+                if len(finished) >= excess:
+                    break
+        for article_id in finished:
+            del self.status[article_id]
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            article_id, article_data = job
+            try:
+                self._process(article_id, article_data)
+            except Exception as e:
+                print(f"Enrichment worker error for {article_id}: {e}")
+            finally:
+                self.jobs.task_done()
+
+    def _cancelled(self, article_id: str) -> bool:
+        status = self.get_status(article_id) or {}
+        return status.get("status") == "cancelled"
+
+    def _process(self, article_id: str, article_data: Dict):
+        status = self.get_status(article_id) or {}
+        if status.get("status") == "cancelled":
+            return
+        attempts = status.get("attempts", 0) + 1
+        self._update_status(article_id, status="running", attempts=attempts)
+
+        try:
+            enriched = self.dbpedia.enrich_article(dict(article_data), strict=True)
+            # the article may have been deleted while the upstream calls were running
+            if self._cancelled(article_id):
+                return
+            if not self.fuseki.set_enrichment_status(article_id, "completed", enriched):
+                raise RuntimeError("Fuseki update failed")
+            self._update_status(
+                article_id,
+                status="completed",
+                error=None,
+                dbpedia_entities=enriched.get("dbpedia_entities", []),
+                wikidata_entities=enriched.get("wikidata_entities", [])
+            )
+            if self.on_update:
+                self.on_update(article_id)
+        except Exception as e:
+            if self._cancelled(article_id):
+                return
+            if attempts < self.max_retries:
+                self._update_status(article_id, status="retrying", error=str(e))
+                timer = threading.Timer(
+                    self.retry_delay * 2 ** (attempts - 1),
+                    self.jobs.put,
+                    args=((article_id, article_data),)
+                )
+                timer.daemon = True
+                timer.start()
+            else:
+                self._update_status(article_id, status="failed", error=str(e))
+                self.fuseki.set_enrichment_status(article_id, "failed")
+                if self.on_update:
+                    self.on_update(article_id)
@@ -0,0 +1,331 @@
+import os
+import re
+import bz2
+import sys
+import gzip
+import time
+import argparse
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Set, Tuple
+
+from services.metrics_service import metrics
+
+ENTITY_TYPES = ("Person", "Place", "Organisation", "Work", "Species", "Event")
+GAZETTEER_HEADER = "# wep-gazetteer 1"
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+NT_LINE = re.compile(r'^<([^>]+)>\s+<([^>]+)>\s+(.+?)\s*\.\s*$')
+NT_LITERAL = re.compile(r'^"((?:[^"\\]|\\.)*)"(?:@([A-Za-z0-9-]+)|\^\^<[^>]*>)?$')
+NT_ESCAPE = re.compile(r"\\(?:u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+NT_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f"}
+RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+RDFS_SUBCLASS = "http://www.w3.org/2000/01/rdf-schema#subClassOf"
+DBPEDIA_ONTOLOGY = "http://dbpedia.org/ontology/"
+DBPEDIA_RESOURCE = "http://dbpedia.org/resource/"
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class EntityLinker:
+    def __init__(self, path: str = None, max_entities: int = 15):
+        self.path = path or os.getenv("GAZETTEER_PATH", "data/gazetteer.tsv.gz")
+        self.max_entities = max_entities
+        self.ready = False
+        self.error = None
+        self.labels = 0
+        self.vocabulary = {}
+        # one slot per state, numbered breadth-first so the children of a state are the
+        # consecutive states child_start[state]..child_start[state + 1], sorted by symbol
+        self.symbols = array("i")
+        self.child_start = array("i")
+        self.output = array("i")
+        self.fail = array("i")
+        self.dict_link = array("i")
+        # one slot per label, the URIs share one buffer and the type lists are interned
+        self.lengths = array("H")
+        self.type_ids = array("B")
+        self.type_table = []
+        self.uri_data = b""
+        self.uri_offsets = array("q")
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self._load_in_background, name="gazetteer-load", daemon=True)
+        thread.start()
+        return thread
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        except Exception as e:
+            self.error = str(e)
+            print(f"Gazetteer load failed: {e}")
+
+    def status(self) -> Dict:
+        return {"ready": self.ready, "labels": self.labels, "states": len(self.symbols), "error": self.error}
+
+    def _lines(self) -> Iterator[Tuple[str, str, List[str]]]:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            if f.readline().rstrip("\n") != GAZETTEER_HEADER:
+                raise ValueError(f"{self.path} is not a gazetteer file")
+            for line in f:
+                label, uri, types = line.rstrip("\n").split("\t")
+                tokens = tokenize(label)
+                if tokens:
+                    yield uri, types, tokens
+
+    @staticmethod
+    def _goto(symbols: array, child_start: array, state: int, symbol: int) -> int:
+        lo = child_start[state]
+        hi = child_start[state + 1]
+        child = bisect_left(symbols, symbol, lo, hi)
+        return child if child < hi and symbols[child] == symbol else -1
+
+    def load(self):
+        start = time.perf_counter()
+        # symbols are numbered in token order, so the sorted file is also sorted by symbols
+        tokens_seen = set()
+        for _, _, tokens in self._lines():
+            tokens_seen.update(tokens)
+        vocabulary = {token: symbol for symbol, token in enumerate(sorted(tokens_seen))}
+        del tokens_seen
+
+        sequences = array("i")
+        offsets = array("q", [0])
+        lengths = array("H")
+        type_ids = array("B")
+        type_table = {}
+        uri_data = bytearray()
+        uri_offsets = array("q", [0])
+        previous = []
+        for uri, types, tokens in self._lines():
+            sequence = [vocabulary[token] for token in tokens]
+            if sequence < previous:
+                raise ValueError(f"{self.path} is not sorted, rebuild it with python -m services.entity_linker")
+            previous = sequence
+            sequences.extend(sequence)
+            offsets.append(len(sequences))
+            lengths.append(len(sequence))
+            type_ids.append(type_table.setdefault(types, len(type_table)))
+            uri_data += (uri[len(DBPEDIA_RESOURCE):] if uri.startswith(DBPEDIA_RESOURCE) else "<" + uri).encode("utf-8")
+            uri_offsets.append(len(uri_data))
+
+        symbols, child_start, output, parents = self._build_trie(sequences, offsets)
+        del sequences, offsets
+        fail, dict_link = self._link(symbols, child_start, output, parents)
+
+        self.vocabulary = vocabulary
+        self.symbols, self.child_start, self.output = symbols, child_start, output
+        self.fail, self.dict_link = fail, dict_link
+        self.lengths, self.type_ids, self.type_table = lengths, type_ids, list(type_table)
+        self.uri_data, self.uri_offsets = bytes(uri_data), uri_offsets
+        self.labels = len(lengths)
+        self.ready = True
+        print(f"Gazetteer loaded {self.labels} labels into {len(symbols)} states "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    @staticmethod
+    def _build_trie(sequences: array, offsets: array) -> Tuple[array, array, array, array]:
+        symbols = array("i", [-1])
+        output = array("i", [-1])
+        parents = array("i", [0])
+        child_start = array("i")
+        # each state of a level covers the run of sorted labels sharing its prefix
+        level = [(0, len(offsets) - 1)]
+        depth = 0
+        while level:
+            next_level = []
+            for lo, hi in level:
+                state = len(child_start)
+                # labels ending here sort before the longer ones sharing the prefix
+                while lo < hi and offsets[lo + 1] - offsets[lo] == depth:
+                    if output[state] == -1:
+                        output[state] = lo
+                    lo += 1
+                child_start.append(len(symbols))
+                i = lo
+                while i < hi:
+                    symbol = sequences[offsets[i] + depth]
+                    j = i + 1
+                    while j < hi and sequences[offsets[j] + depth] == symbol:
+                        j += 1
+                    symbols.append(symbol)
+                    output.append(-1)
+                    parents.append(state)
+                    next_level.append((i, j))
+                    i = j
+            level = next_level
+            depth += 1
+        child_start.append(len(symbols))
+        return symbols, child_start, output, parents
+
+    @classmethod
+    def _link(cls, symbols: array, child_start: array, output: array,
+              parents: array) -> Tuple[array, array]:
+        states = len(symbols)
+        fail = array("i", [0]) * states
+        dict_link = array("i", [-1]) * states
+        # breadth-first numbering means every fail target is finished before the states pointing at it
+        for state in range(1, states):
+            parent = parents[state]
+            if parent:
+                symbol = symbols[state]
+                target = fail[parent]
+                while True:
+                    child = cls._goto(symbols, child_start, target, symbol)
+                    if child >= 0 or not target:
+                        fail[state] = max(child, 0)
+                        break
+                    target = fail[target]
+            target = fail[state]
+            dict_link[state] = target if output[target] != -1 else dict_link[target]
+        return fail, dict_link
+
+    def _uri(self, entity: int) -> str:
+        uri = self.uri_data[self.uri_offsets[entity]:self.uri_offsets[entity + 1]].decode("utf-8")
+        return uri[1:] if uri.startswith("<") else DBPEDIA_RESOURCE + uri
+
+    def _matches(self, symbols: List[int]) -> Iterator[Tuple[int, int, int]]:
+        state = 0
+        for end, symbol in enumerate(symbols):
+            if symbol < 0:
+                state = 0
+                continue
+            while True:
+                child = self._goto(self.symbols, self.child_start, state, symbol)
+                if child >= 0 or not state:
+                    state = max(child, 0)
+                    break
+                state = self.fail[state]
+            match = state if self.output[state] != -1 else self.dict_link[state]
+            while match > 0:
+                entity = self.output[match]
+                yield end - self.lengths[entity] + 1, end + 1, entity
+                match = self.dict_link[match]
+
+    def annotate(self, text: str) -> List[Dict[str, str]]:
+        if not self.ready:
+            raise RuntimeError("Gazetteer is not loaded")
+        with metrics.timer("wep_operation_duration_seconds", operation="entity_linking"):
+            tokens = tokenize(text)
+            symbols = [self.vocabulary.get(token, -1) for token in tokens]
+            # leftmost-longest, non-overlapping, like a surface form spotter
+            candidates = sorted(self._matches(symbols), key=lambda m: (m[0], m[0] - m[1]))
+            resources = []
+            seen = set()
+            covered = 0
+            for start, end, entity in candidates:
+                if start < covered:
+                    continue
+                covered = end
+                if entity in seen:
+                    continue
+                seen.add(entity)
+                resources.append({
+                    "@URI": self._uri(entity),
+                    "@types": self.type_table[self.type_ids[entity]],
+                    "@surfaceForm": " ".join(tokens[start:end])
+                })
+                if len(resources) >= self.max_entities:
+                    break
+        return resources
+
+def _open(path: str):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+def _unescape(match) -> str:
+    escape = match.group(0)
+    if escape[1] in "uU":
+        return chr(int(escape[2:], 16))
+    return NT_ESCAPES.get(escape[1], escape[1])
+
+def _triples(path: str, predicate: str) -> Iterator[Tuple[str, str]]:
+    with _open(path) as f:
+        for line in f:
+            match = NT_LINE.match(line)
+            if match and match.group(2) == predicate:
+                yield match.group(1), match.group(3)
+
+def _type_closure(ontology_paths: List[str]) -> Dict[str, Set[str]]:
+    parents = {}
+    for path in ontology_paths:
+        for subclass, superclass in _triples(path, RDFS_SUBCLASS):
+            parents.setdefault(subclass, set()).add(superclass.strip("<>"))
+
+    closure = {}
+    def ancestors(cls: str) -> Set[str]:
+        if cls not in closure:
+            closure[cls] = set()
+            found = {cls}
+            for parent in parents.get(cls, ()):
+                found |= ancestors(parent)
+            closure[cls] = found
+        return closure[cls]
+    for cls in list(parents):
+        ancestors(cls)
+    return closure
+
+def build_gazetteer(labels_paths: List[str], types_paths: List[str], output: str,
+                    ontology_paths: List[str] = None, language: str = "en", min_length: int = 3) -> int:
+    closure = _type_closure(ontology_paths or [])
+    wanted = {DBPEDIA_ONTOLOGY + name: name for name in ENTITY_TYPES}
+
+    entity_types = {}
+    for path in types_paths:
+        for resource, obj in _triples(path, RDF_TYPE):
+            cls = obj.strip("<>")
+            for ancestor in closure.get(cls, {cls}):
+                if ancestor in wanted:
+                    entity_types.setdefault(resource, set()).add(wanted[ancestor])
+    print(f"{len(entity_types)} resources typed as {', '.join(ENTITY_TYPES)}", file=sys.stderr)
+
+    # one resource per surface form; plain titles win over disambiguated ones such as Paris_(mythology)
+    best = {}
+    for path in labels_paths:
+        for resource, obj in _triples(path, RDFS_LABEL):
+            if resource not in entity_types:
+                continue
+            literal = NT_LITERAL.match(obj)
+            if not literal or (literal.group(2) and literal.group(2) != language):
+                continue
+            label = NT_ESCAPE.sub(_unescape, literal.group(1))
+            key = " ".join(tokenize(label))
+            if len(key) < min_length or key.replace(" ", "").isdigit():
+                continue
+            rank = ("(" in resource, len(resource))
+            if key not in best or rank < best[key][0]:
+                best[key] = (rank, label, resource)
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with gzip.open(output, "wt", encoding="utf-8") as f:
+        f.write(GAZETTEER_HEADER + "\n")
+        for key in sorted(best):
+            _, label, resource = best[key]
+            types = ",".join(f"DBpedia:{name}" for name in sorted(entity_types[resource]))
+            f.write(f"{' '.join(label.split())}\t{resource}\t{types}\n")
+    return len(best)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local entity linker gazetteer from DBpedia dumps")
+    parser.add_argument("--labels", nargs="+", required=True, help="rdfs:label dump(s), N-Triples, optionally .bz2/.gz")
+    parser.add_argument("--types", nargs="+", required=True, help="rdf:type dump(s), e.g. instance-types transitive")
+    parser.add_argument("--ontology", nargs="*", default=[],
+                        help="DBpedia ontology N-Triples, to map specific types onto their parent classes")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--min-length", type=int, default=3)
+    parser.add_argument("--output", default=os.getenv("GAZETTEER_PATH", "data/gazetteer.tsv.gz"))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_gazetteer(args.labels, args.types, args.output, args.ontology, args.language, args.min_length)
+    print(f"Wrote {count} labels to {args.output} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import gzip
+import zlib
+from typing import Dict, Iterator, Optional
+
+EXPORT_FORMATS = {"nt": "N-Triples", "nq": "N-Quads"}
+NT_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+def nt_term(binding: Dict[str, str]) -> str:
+    if binding["type"] == "uri":
+        return f"<{binding['value']}>"
+    if binding["type"] == "bnode":
+        return f"_:{binding['value']}"
+    literal = '"' + binding["value"].translate(NT_ESCAPES) + '"'
+    if "xml:lang" in binding:
+        return f"{literal}@{binding['xml:lang']}"
+    if "datatype" in binding:
+        return f"{literal}^^<{binding['datatype']}>"
+    return literal
+
+class DatasetExporter:
+    def __init__(self, fuseki_service, chunk_size: int = None, compression_level: int = 6):
+        self.fuseki = fuseki_service
+        self.chunk_size = chunk_size or int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+        self.compression_level = compression_level
+
+    def filename(self, format: str) -> str:
+        return f"wep-export.{format}.gz"
+
+    def export(self, format: str = "nt", since: Optional[str] = None, until: Optional[str] = None,
+               cursor: Optional[str] = None) -> Iterator[bytes]:
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}. Use one of {', '.join(EXPORT_FORMATS)}")
+        # validated up front so bad parameters fail with a status code instead of a broken stream
+        if since:
+            self.fuseki.parse_export_bound(since)
+        if until:
+            self.fuseki.parse_export_bound(until)
+        if cursor:
+            self.fuseki.decode_cursor(cursor)
+        return self._stream(format, since, until, cursor)
+
+    def _stream(self, format: str, since: Optional[str], until: Optional[str],
+                cursor: Optional[str]) -> Iterator[bytes]:
+        # every page is a complete gzip member: an interrupted download still decompresses up to
+        # the last finished page, whose trailing "# cursor" comment is where to resume
+        while True:
+            page = self.fuseki.get_export_page(self.chunk_size, cursor, since, until)
+            if not page:
+                break
+            compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, 31)
+            lines = []
+            buffered = 0
+            for binding in self.fuseki.iter_export_bindings([article["id"] for article in page]):
+                terms = [nt_term(binding["s"]), nt_term(binding["p"]), nt_term(binding["o"])]
+                if format == "nq" and "g" in binding:
+                    terms.append(nt_term(binding["g"]))
+                line = " ".join(terms) + " .\n"
+                lines.append(line)
+                buffered += len(line)
+                if buffered >= 65536:
+                    data = compressor.compress("".join(lines).encode("utf-8"))
+                    lines = []
+                    buffered = 0
+                    if data:
+                        yield data
+            cursor = self.fuseki.encode_cursor(page[-1])
+            lines.append(f"# cursor {cursor}\n")
+            yield compressor.compress("".join(lines).encode("utf-8")) + compressor.flush()
+            if len(page) < self.chunk_size:
+                break
+        yield gzip.compress(b"# end\n", self.compression_level)
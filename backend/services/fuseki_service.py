@@ -1,96 +1,253 @@
 import os
-import requests
-from requests.auth import HTTPBasicAuth
-from SPARQLWrapper import SPARQLWrapper, JSON, POST, DIGEST
-from typing import List, Dict, Any
+import json
+import base64
+from rdflib import Graph, RDF, URIRef
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
+import re
 import uuid
 
+from services.storage import StorageBackend
+from services.metrics_service import metrics
+
+ARTICLE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+STORAGE_LAYOUTS = ("default", "graph")
+
+ARTICLE_PREFIXES = """
+PREFIX prov: <http://www.w3.org/ns/prov#>
+PREFIX dc: <http://purl.org/dc/elements/1.1/>
+PREFIX dcterms: <http://purl.org/dc/terms/>
+PREFIX schema: <http://schema.org/>
+PREFIX iptc: <http://iptc.org/std/Iptc4xmpExt/2008-02-29/>
+PREFIX wep: <http://example.org/wep/>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
+
+def escape_sparql(s):
+    return s.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+
 class FusekiService:
-    def __init__(self, fuseki_url: str):
-        self.base_url = fuseki_url
-        self.dataset = "news-provenance"
-        self.sparql_endpoint = f"{fuseki_url}/{self.dataset}/sparql"
-        self.update_endpoint = f"{fuseki_url}/{self.dataset}/update"
-        self.username = os.getenv("FUSEKI_USERNAME", "admin")
-        self.password = os.getenv("FUSEKI_PASSWORD", "admin123")
-        self.auth = HTTPBasicAuth(self.username, self.password)
+    STATISTICS_QUERIES = {
+        "total_articles": """
+            PREFIX schema: <http://schema.org/>
+            SELECT (COUNT(?article) AS ?count)
+            WHERE { ?article a schema:NewsArticle . }
+        """,
+        "total_authors": """
+            PREFIX schema: <http://schema.org/>
+            SELECT (COUNT(DISTINCT ?author) AS ?count)
+            WHERE { ?article a schema:NewsArticle ; schema:author ?author . }
+        """,
+        "articles_by_language": """
+            PREFIX schema: <http://schema.org/>
+            SELECT ?language (COUNT(?article) AS ?count)
+            WHERE { ?article a schema:NewsArticle ; schema:inLanguage ?language . }
+            GROUP BY ?language
+        """,
+        "top_keywords": """
+            PREFIX schema: <http://schema.org/>
+            SELECT ?keyword (COUNT(?article) AS ?count)
+            WHERE { ?article a schema:NewsArticle ; schema:keywords ?keyword . }
+            GROUP BY ?keyword
+            ORDER BY DESC(?count)
+            LIMIT 10
+        """
+    }
+    
+    def __init__(self, storage: StorageBackend, layout: str = None):
         self.namespace = os.getenv("BASE_URL", "http://localhost:8000")
+        self.storage = storage
+        self.layout = layout or os.getenv("STORAGE_LAYOUT", "default")
+        if self.layout not in STORAGE_LAYOUTS:
+            raise ValueError(f"Unknown storage layout: {self.layout}")
+        # with the graph layout each article, its activity and its agent live in a named graph
+        # called after the article URI; reads rely on the store exposing the union as default graph
+        self.graph_layout = self.layout == "graph"
+        self.write_generation = 0
         
     def check_connection(self) -> bool:
-        try:
-            response = requests.get(f"{self.base_url}/$/ping", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        return self.storage.ping()
+    
+    def _timer(self, name: str):
+        return metrics.timer("wep_fuseki_query_duration_seconds", errors="wep_fuseki_errors_total", query=name)
     
-    def execute_sparql(self, query: str) -> Dict[str, Any]:
-        sparql = SPARQLWrapper(self.sparql_endpoint)
-        sparql.setQuery(query)
-        sparql.setReturnFormat(JSON)
-        return sparql.query().convert()
+    def execute_sparql(self, query: str, name: str = "sparql_query") -> Dict[str, Any]:
+        with self._timer(name):
+            return self.storage.query(query)
     
-    def execute_update(self, update_query: str) -> bool:
+    def execute_update(self, update_query: str, name: str = "sparql_update") -> bool:
         try:
-            headers = {"Content-Type": "application/sparql-update"}
-            response = requests.post(
-                self.update_endpoint,
-                data=update_query,
-                headers=headers,
-                auth=self.auth,
-                timeout=10
-            )
-            return response.status_code in [200, 201, 204]
+            with self._timer(name):
+                success = self.storage.update(update_query)
+            if not success:
+                metrics.inc("wep_fuseki_errors_total", query=name)
+            return success
         except Exception as e:
             print(f"Update error: {e}")
             return False
+        finally:
+            # bumped on failure too, a rejected update may still have partially applied
+            self.write_generation += 1
     
-    def get_articles(self) -> List[Dict]:
-        query = """
+    def _iter_rows(self, query: str, name: str = "sparql_query") -> Iterator[Dict[str, str]]:
+        with self._timer(name):
+            rows = self.storage.select_rows(query)
+        yield from rows
+    
+    @staticmethod
+    def _binding_values(result: Dict) -> Iterator[Dict[str, str]]:
+        for binding in result.get("results", {}).get("bindings", []):
+            yield {k: v["value"] for k, v in binding.items()}
+    
+    @staticmethod
+    def encode_cursor(article: Dict) -> str:
+        payload = json.dumps({"created": article["created_at"], "id": article["id"]})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            created = payload["created"]
+            datetime.fromisoformat(created.replace("Z", "+00:00"))
+            return created, str(uuid.UUID(payload["id"]))
+        except Exception:
+            raise ValueError("Invalid cursor")
+    
+    def _articles_query(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> str:
+        page_filter = ""
+        if cursor:
+            created, article_id = self.decode_cursor(cursor)
+            article_uri = f"{self.namespace}/article/{article_id}"
+            page_filter = f"""
+                FILTER(?created < "{created}"^^xsd:dateTime ||
+                       (?created = "{created}"^^xsd:dateTime && STR(?article) < "{article_uri}"))"""
+        
+        page = f"""
+            ?article a schema:NewsArticle ;
+                     schema:dateCreated ?created .{page_filter}"""
+        if limit:
+            page = f"""
+            {{
+                SELECT ?article ?created
+                WHERE {{{page}
+                }}
+                ORDER BY DESC(?created) DESC(?article)
+                LIMIT {int(limit)}
+            }}"""
+        
+        return f"""
         PREFIX prov: <http://www.w3.org/ns/prov#>
         PREFIX dcterms: <http://purl.org/dc/terms/>
         PREFIX schema: <http://schema.org/>
         PREFIX wep: <http://example.org/wep/>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
         
         SELECT ?article ?title ?author ?content ?publication ?language ?created ?keyword
-        WHERE {
-            ?article a schema:NewsArticle ;
-                     schema:headline ?title ;
+        WHERE {{{page}
+            ?article schema:headline ?title ;
                      schema:author ?author ;
                      schema:articleBody ?content ;
                      schema:publisher ?publication ;
-                     schema:inLanguage ?language ;
-                     schema:dateCreated ?created .
-            OPTIONAL { ?article schema:keywords ?keyword . }
-        }
-        ORDER BY DESC(?created)
+                     schema:inLanguage ?language .
+            OPTIONAL {{ ?article schema:keywords ?keyword . }}
+        }}
+        ORDER BY DESC(?created) DESC(?article)
         """
-        result = self.execute_sparql(query)
-        
-        articles_dict = {}
-        for binding in result.get("results", {}).get("bindings", []):
-            article_id = binding["article"]["value"].split("/")[-1]
+    
+    @staticmethod
+    def _group_article_rows(rows: Iterable[Dict[str, str]]) -> Iterator[Dict]:
+        current = None
+        for row in rows:
+            article_id = row["article"].split("/")[-1]
             
-            if article_id not in articles_dict:
-                articles_dict[article_id] = {
+            if current is None or current["id"] != article_id:
+                if current is not None:
+                    yield current
+                current = {
                     "id": article_id,
-                    "title": binding["title"]["value"],
-                    "author": binding["author"]["value"],
-                    "content": binding["content"]["value"],
-                    "publication": binding["publication"]["value"],
-                    "language": binding["language"]["value"],
-                    "created_at": binding["created"]["value"],
+                    "title": row["title"],
+                    "author": row["author"],
+                    "content": row["content"],
+                    "publication": row["publication"],
+                    "language": row["language"],
+                    "created_at": row["created"],
                     "keywords": []
                 }
             
-            if "keyword" in binding:
-                keyword = binding["keyword"]["value"]
-                if keyword not in articles_dict[article_id]["keywords"]:
-                    articles_dict[article_id]["keywords"].append(keyword)
+            if "keyword" in row:
+                keyword = row["keyword"]
+                if keyword not in current["keywords"]:
+                    current["keywords"].append(keyword)
         
-        return list(articles_dict.values())
+        if current is not None:
+            yield current
     
-    def create_article(self, article_data: Dict) -> Dict:
+    def get_articles(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Dict]:
+        result = self.execute_sparql(self._articles_query(limit, cursor), "get_articles")
+        return list(self._group_article_rows(self._binding_values(result)))
+    
+    def iter_articles(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Iterator[Dict]:
+        return self._group_article_rows(self._iter_rows(self._articles_query(limit, cursor), "iter_articles"))
+    
+    @staticmethod
+    def _entity_triples(article_data: Dict) -> str:
+        dbpedia_triples = ""
+        if article_data.get("dbpedia_entities"):
+            for entity in article_data["dbpedia_entities"]:
+                dbpedia_triples += f'    wep:relatedEntity <{entity}> ;\n'
+        
+        if article_data.get("wikidata_entities"):
+            for entity in article_data["wikidata_entities"]:
+                dbpedia_triples += f'    wep:wikidataEntity <{entity}> ;\n'
+                dbpedia_triples += f'    wep:relatedEntity <{entity}> ;\n'
+        return dbpedia_triples
+    
+    def set_enrichment_status(self, article_id: str, status: str, enriched_data: Dict = None) -> bool:
+        article_uri = f"{self.namespace}/article/{article_id}"
+        entity_triples = self._entity_triples(enriched_data or {})
+        triples = f"""
+            <{article_uri}>
+                {entity_triples}
+                wep:enrichmentStatus "{escape_sparql(status)}" ."""
+        # matches nothing once the article is deleted, so a late worker cannot revive its URI
+        update_query = f"""
+        PREFIX schema: <http://schema.org/>
+        PREFIX wep: <http://example.org/wep/>
+        
+        {f"WITH <{article_uri}>" if self.graph_layout else ""}
+        DELETE {{ <{article_uri}> wep:enrichmentStatus ?status . }}
+        INSERT {{ {triples} }}
+        WHERE {{
+            <{article_uri}> a schema:NewsArticle .
+            OPTIONAL {{ <{article_uri}> wep:enrichmentStatus ?status . }}
+        }}
+        """
+        return self.execute_update(update_query, "set_enrichment_status")
+    
+    def get_pending_enrichments(self) -> List[Dict]:
+        query = """
+        PREFIX schema: <http://schema.org/>
+        PREFIX wep: <http://example.org/wep/>
+        
+        SELECT ?article ?title ?content
+        WHERE {
+            ?article wep:enrichmentStatus "pending" ;
+                     schema:headline ?title ;
+                     schema:articleBody ?content .
+        }
+        """
+        result = self.execute_sparql(query, "get_pending_enrichments")
+        return [
+            {
+                "id": row["article"].split("/")[-1],
+                "title": row["title"],
+                "content": row["content"]
+            }
+            for row in self._binding_values(result)
+        ]
+    
+    def _article_insert(self, article_data: Dict) -> Tuple[str, Dict]:
         article_id = str(uuid.uuid4())
         article_uri = f"{self.namespace}/article/{article_id}"
         activity_uri = f"{self.namespace}/activity/{uuid.uuid4()}"
@@ -98,9 +255,6 @@ class FusekiService:
         
         now = datetime.utcnow().isoformat() + "Z"
         
-        def escape_sparql(s):
-            return s.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
-        
         title = escape_sparql(article_data['title'])
         author = escape_sparql(article_data['author'])
         content = escape_sparql(article_data['content'])
@@ -117,15 +271,9 @@ class FusekiService:
             for subj in article_data["iptc_subjects"]:
                 iptc_triples += f'    iptc:subject "{escape_sparql(subj)}" ;\n'
         
-        dbpedia_triples = ""
-        if article_data.get("dbpedia_entities"):
-            for entity in article_data["dbpedia_entities"]:
-                dbpedia_triples += f'    wep:relatedEntity <{entity}> ;\n'
-        
-        if article_data.get("wikidata_entities"):
-            for entity in article_data["wikidata_entities"]:
-                dbpedia_triples += f'    wep:wikidataEntity <{entity}> ;\n'
-                dbpedia_triples += f'    wep:relatedEntity <{entity}> ;\n'
+        dbpedia_triples = self._entity_triples(article_data)
+        if article_data.get("enrichment_status"):
+            dbpedia_triples += f'    wep:enrichmentStatus "{escape_sparql(article_data["enrichment_status"])}" ;\n'
         
         multimedia_triples = ""
         if article_data.get("image_urls"):
@@ -141,30 +289,12 @@ class FusekiService:
                 if aud_url:
                     multimedia_triples += f'    schema:audio <{aud_url}> ;\n'
         
+        derivations = self._derivations(article_data)
         derivation_triples = ""
-        if article_data.get("based_on_article_id"):
-            based_uri = f"{self.namespace}/article/{article_data['based_on_article_id']}"
-            dtype = article_data.get("derivation_type", "Derivation")
-            if dtype == "Translation":
-                derivation_triples += f'    prov:wasRevisionOf <{based_uri}> ;\n'
-            elif dtype == "Revision":
-                derivation_triples += f'    prov:wasRevisionOf <{based_uri}> ;\n'
-            else:
-                derivation_triples += f'    prov:wasDerivedFrom <{based_uri}> ;\n'
-        
-        if article_data.get("url"):
-            derivation_triples += f'    prov:wasDerivedFrom <{article_data["url"]}> ;\n'
-        
-        insert_query = f"""
-        PREFIX prov: <http://www.w3.org/ns/prov#>
-        PREFIX dc: <http://purl.org/dc/elements/1.1/>
-        PREFIX dcterms: <http://purl.org/dc/terms/>
-        PREFIX schema: <http://schema.org/>
-        PREFIX iptc: <http://iptc.org/std/Iptc4xmpExt/2008-02-29/>
-        PREFIX wep: <http://example.org/wep/>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+        for derivation in derivations:
+            derivation_triples += f'    prov:{derivation["relation"]} <{derivation["source"]}> ;\n'
         
-        INSERT DATA {{
+        triples = f"""
             <{article_uri}> a schema:NewsArticle, prov:Entity ;
                 dc:title "{title}" ;
                 schema:headline "{title}" ;
@@ -191,107 +321,362 @@ class FusekiService:
             
             <{agent_uri}> a prov:Agent, schema:Person ;
                 schema:name "{author}" .
-        }}
         """
         
-        success = self.execute_update(insert_query)
-        if success:
-            return {
-                "id": article_id,
-                "title": article_data["title"],
-                "author": article_data["author"],
-                "content": article_data["content"],
-                "publication": article_data["publication"],
-                "language": language,
-                "keywords": article_data.get("keywords", []),
-                "created_at": now,
-                "dbpedia_entities": article_data.get("dbpedia_entities", [])
-            }
+        return self._in_graph(article_uri, triples), {
+            "id": article_id,
+            "title": article_data["title"],
+            "author": article_data["author"],
+            "content": article_data["content"],
+            "publication": article_data["publication"],
+            "language": language,
+            "keywords": article_data.get("keywords", []),
+            "created_at": now,
+            "dbpedia_entities": article_data.get("dbpedia_entities", []),
+            "enrichment_status": article_data.get("enrichment_status"),
+            "derivations": derivations
+        }
+    
+    def _derivations(self, article_data: Dict) -> List[Dict]:
+        derivations = []
+        if article_data.get("based_on_article_id"):
+            based_uri = f"{self.namespace}/article/{article_data['based_on_article_id']}"
+            dtype = article_data.get("derivation_type", "Derivation")
+            if dtype in ("Translation", "Revision"):
+                derivations.append({"relation": "wasRevisionOf", "source": based_uri})
+            else:
+                derivations.append({"relation": "wasDerivedFrom", "source": based_uri})
+        
+        if article_data.get("url"):
+            derivations.append({"relation": "wasDerivedFrom", "source": article_data["url"]})
+        return derivations
+    
+    def _in_graph(self, article_uri: str, triples: str) -> str:
+        if self.graph_layout:
+            return f"GRAPH <{article_uri}> {{{triples}}}"
+        return triples
+    
+    def _insert_data(self, triples: str) -> bool:
+        insert_query = f"""
+        {ARTICLE_PREFIXES}
+        INSERT DATA {{
+            {triples}
+        }}
+        """
+        return self.execute_update(insert_query, "insert_articles")
+    
+    def create_article(self, article_data: Dict) -> Dict:
+        triples, article = self._article_insert(article_data)
+        if self._insert_data(triples):
+            return article
         return None
     
-    def get_article_with_provenance(self, article_id: str) -> Dict:
+    def create_articles(self, articles_data: List[Dict]) -> List[Optional[Dict]]:
+        inserts = [self._article_insert(article_data) for article_data in articles_data]
+        if not inserts:
+            return []
+        if self._insert_data("\n".join(triples for triples, _ in inserts)):
+            return [article for _, article in inserts]
+        return [article if self._insert_data(triples) else None for triples, article in inserts]
+    
+    EDITABLE_PROPERTIES = {
+        "title": ("dc:title", "schema:headline"),
+        "author": ("dc:creator", "schema:author"),
+        "content": ("schema:articleBody",),
+        "publication": ("dc:publisher", "schema:publisher"),
+        "language": ("dc:language", "schema:inLanguage")
+    }
+    
+    EDITABLE_LISTS = {
+        "keywords": "schema:keywords",
+        "image_urls": "schema:image",
+        "video_urls": "schema:video",
+        "audio_urls": "schema:audio"
+    }
+    
+    def _edit_activity(self, article_uri: str, relation: str, now: str, editor: Optional[str],
+                       changed: List[str] = None) -> Tuple[str, str]:
+        activity_uri = f"{self.namespace}/activity/{uuid.uuid4()}"
+        changed_triples = "".join(f'    wep:changedProperty "{field}" ;\n' for field in changed or [])
+        agent_triples = ""
+        if editor:
+            agent_uri = f"{self.namespace}/agent/{uuid.uuid4()}"
+            changed_triples += f"    prov:wasAssociatedWith <{agent_uri}> ;\n"
+            agent_triples = f"""
+            <{agent_uri}> a prov:Agent, schema:Person ;
+                schema:name "{escape_sparql(editor)}" ."""
+        
+        return activity_uri, f"""
+            <{article_uri}> prov:{relation} <{activity_uri}> .
+            
+            <{activity_uri}> a prov:Activity ;
+                {changed_triples}
+                prov:startedAtTime "{now}"^^xsd:dateTime ;
+                prov:endedAtTime "{now}"^^xsd:dateTime .
+            {agent_triples}"""
+    
+    @staticmethod
+    def _literal_or_uri(field: str, value: str) -> str:
+        if field.endswith("_urls"):
+            return f"<{value}>"
+        return f'"{escape_sparql(value)}"'
+    
+    def update_article(self, article_id: str, current: Dict, changes: Dict, editor: Optional[str] = None) -> Optional[Dict]:
         article_uri = f"{self.namespace}/article/{article_id}"
-        query = f"""
+        now = datetime.utcnow().isoformat() + "Z"
+        
+        deletes = []
+        inserts = []
+        optionals = []
+        changed = []
+        for field, value in changes.items():
+            if field in self.EDITABLE_PROPERTIES and value != current.get(field):
+                for prop in self.EDITABLE_PROPERTIES[field]:
+                    var = f"?old{len(optionals)}"
+                    deletes.append(f"<{article_uri}> {prop} {var} .")
+                    inserts.append(f"<{article_uri}> {prop} {self._literal_or_uri(field, value)} .")
+                    optionals.append(f"OPTIONAL {{ <{article_uri}> {prop} {var} . }}")
+                changed.append(field)
+            elif field in self.EDITABLE_LISTS:
+                old_values = current.get(field) or []
+                removed = [v for v in old_values if v not in value]
+                added = [v for v in dict.fromkeys(value) if v not in old_values]
+                prop = self.EDITABLE_LISTS[field]
+                deletes.extend(f"<{article_uri}> {prop} {self._literal_or_uri(field, v)} ." for v in removed)
+                inserts.extend(f"<{article_uri}> {prop} {self._literal_or_uri(field, v)} ." for v in added)
+                if removed or added:
+                    changed.append(field)
+        
+        if not changed:
+            return {"activity": None, "changed": [], "modified_at": None}
+        
+        activity_uri, activity_triples = self._edit_activity(article_uri, "wasInfluencedBy", now, editor, changed)
+        for prop in ("dcterms:modified", "schema:dateModified"):
+            var = f"?old{len(optionals)}"
+            deletes.append(f"<{article_uri}> {prop} {var} .")
+            inserts.append(f'<{article_uri}> {prop} "{now}"^^xsd:dateTime .')
+            optionals.append(f"OPTIONAL {{ <{article_uri}> {prop} {var} . }}")
+        
+        # only the changed predicates and list values are touched; the type check turns the
+        # update into a no-op when the article was deleted in the meantime
+        newline = "\n            "
+        update_query = f"""
+        {ARTICLE_PREFIXES}
+        {f"WITH <{article_uri}>" if self.graph_layout else ""}
+        DELETE {{
+            {newline.join(deletes)}
+        }}
+        INSERT {{
+            {newline.join(inserts)}
+            {activity_triples}
+        }}
+        WHERE {{
+            <{article_uri}> a schema:NewsArticle .
+            {newline.join(optionals)}
+        }}
+        """
+        if not self.execute_update(update_query, "update_article"):
+            return None
+        return {"activity": activity_uri, "changed": changed, "modified_at": now}
+    
+    def delete_article(self, article_id: str, editor: Optional[str] = None) -> Optional[Dict]:
+        article_uri = f"{self.namespace}/article/{article_id}"
+        now = datetime.utcnow().isoformat() + "Z"
+        activity_uri, tombstone = self._edit_activity(article_uri, "wasInvalidatedBy", now, editor)
+        
+        if self.graph_layout:
+            remove = f"DROP SILENT GRAPH <{article_uri}>"
+        else:
+            remove = f"""
+        DELETE {{
+            <{article_uri}> ?p ?o .
+            ?activity ?ap ?ao .
+            ?agent ?gp ?go .
+        }}
+        WHERE {{
+            {{ <{article_uri}> ?p ?o . }}
+            UNION
+            {{
+                <{article_uri}> prov:wasGeneratedBy|prov:wasInfluencedBy ?activity .
+                ?activity ?ap ?ao .
+            }}
+            UNION
+            {{
+                <{article_uri}> (prov:wasGeneratedBy|prov:wasInfluencedBy)/prov:wasAssociatedWith ?agent .
+                ?agent ?gp ?go .
+            }}
+        }}"""
+        
+        # derived articles keep pointing at the URI, which is left with a prov:wasInvalidatedBy tombstone
+        update_query = f"""
+        {ARTICLE_PREFIXES}
+        {remove} ;
+        INSERT DATA {{
+            {self._in_graph(article_uri, tombstone)}
+        }}
+        """
+        if not self.execute_update(update_query, "delete_article"):
+            return None
+        return {"activity": activity_uri, "deleted_at": now}
+    
+    MULTI_VALUED_PROPERTIES = {
+        "keywords": "schema:keywords",
+        "images": "schema:image",
+        "videos": "schema:video",
+        "audios": "schema:audio",
+        "derivedFrom": "prov:wasDerivedFrom",
+        "relatedEntities": "wep:relatedEntity",
+        "wikidataEntities": "wep:wikidataEntity"
+    }
+    
+    def _article_values(self, article_ids: List[str]) -> str:
+        for article_id in article_ids:
+            if not ARTICLE_ID_PATTERN.match(article_id):
+                raise ValueError(f"Invalid article id: {article_id}")
+        return " ".join(f"<{self.namespace}/article/{article_id}>" for article_id in article_ids)
+    
+    def _article_detail_query(self, article_ids: List[str], include_content: bool = True) -> str:
+        content_triple = "schema:articleBody ?content ;" if include_content else ""
+        properties = " ".join(f'({prop} "{field}")' for field, prop in self.MULTI_VALUED_PROPERTIES.items())
+        
+        return f"""
         PREFIX prov: <http://www.w3.org/ns/prov#>
         PREFIX schema: <http://schema.org/>
         PREFIX wep: <http://example.org/wep/>
         
-        SELECT ?title ?author ?content ?publication ?language ?created 
-               ?image ?video ?audio ?keyword
-               ?activity ?agent ?agentName
+        SELECT ?article ?title ?author ?content ?publication ?language ?created ?enrichmentStatus
+               ?activity ?agent ?agentName ?startTime ?endTime ?field ?value
         WHERE {{
-            <{article_uri}> a schema:NewsArticle ;
-                schema:headline ?title ;
-                schema:author ?author ;
-                schema:articleBody ?content ;
-                schema:publisher ?publication ;
-                schema:inLanguage ?language ;
-                schema:dateCreated ?created .
-            
-            OPTIONAL {{ <{article_uri}> schema:image ?image . }}
-            OPTIONAL {{ <{article_uri}> schema:video ?video . }}
-            OPTIONAL {{ <{article_uri}> schema:audio ?audio . }}
-            OPTIONAL {{ <{article_uri}> schema:keywords ?keyword . }}
-            
-            OPTIONAL {{
-                <{article_uri}> prov:wasGeneratedBy ?activity .
-                ?activity prov:wasAssociatedWith ?agent .
-                ?agent schema:name ?agentName .
+            VALUES ?article {{ {self._article_values(article_ids)} }}
+            {{
+                ?article a schema:NewsArticle ;
+                    schema:headline ?title ;
+                    schema:author ?author ;
+                    {content_triple}
+                    schema:publisher ?publication ;
+                    schema:inLanguage ?language ;
+                    schema:dateCreated ?created .
+                
+                OPTIONAL {{ ?article wep:enrichmentStatus ?enrichmentStatus . }}
+                
+                OPTIONAL {{
+                    ?article prov:wasGeneratedBy ?activity .
+                    ?activity prov:wasAssociatedWith ?agent .
+                    ?agent schema:name ?agentName .
+                    OPTIONAL {{ ?activity prov:startedAtTime ?startTime . }}
+                    OPTIONAL {{ ?activity prov:endedAtTime ?endTime . }}
+                }}
+            }}
+            UNION
+            {{
+                VALUES (?property ?field) {{ {properties} }}
+                ?article ?property ?value .
             }}
         }}
         """
-        result = self.execute_sparql(query)
-        bindings = result.get("results", {}).get("bindings", [])
-        if bindings:
-            b = bindings[0]
-            
-            image_urls = list(set([binding["image"]["value"] for binding in bindings if "image" in binding]))
-            video_urls = list(set([binding["video"]["value"] for binding in bindings if "video" in binding]))
-            audio_urls = list(set([binding["audio"]["value"] for binding in bindings if "audio" in binding]))
-            keywords = list(set([binding["keyword"]["value"] for binding in bindings if "keyword" in binding]))
-            
-            article_data = {
-                "id": article_id,
-                "title": b["title"]["value"],
-                "author": b["author"]["value"],
-                "content": b["content"]["value"],
-                "publication": b["publication"]["value"],
-                "language": b["language"]["value"],
-                "created_at": b["created"]["value"],
-                "keywords": keywords,
-                "image_urls": image_urls,
-                "video_urls": video_urls,
-                "audio_urls": audio_urls
+    
+    def _shape_article_details(self, result: Dict) -> Dict[str, Tuple[Dict, Dict]]:
+        rows = {}
+        values = {}
+        for binding in self._binding_values(result):
+            article_id = binding["article"].split("/")[-1]
+            article_values = values.setdefault(article_id, {field: [] for field in self.MULTI_VALUED_PROPERTIES})
+            if "field" in binding:
+                if binding["value"] not in article_values[binding["field"]]:
+                    article_values[binding["field"]].append(binding["value"])
+            elif article_id not in rows:
+                rows[article_id] = binding
+        
+        return {
+            article_id: self._build_article_detail(article_id, row, values[article_id])
+            for article_id, row in rows.items()
+        }
+    
+    def _shape_article_detail(self, article_id: str, result: Dict) -> Tuple[Optional[Dict], Dict]:
+        return self._shape_article_details(result).get(article_id, (None, {}))
+    
+    def _build_article_detail(self, article_id: str, row: Dict, values: Dict) -> Tuple[Dict, Dict]:
+        article_data = {
+            "id": article_id,
+            "title": row["title"],
+            "author": row["author"],
+            "content": row.get("content"),
+            "publication": row["publication"],
+            "language": row["language"],
+            "created_at": row["created"],
+            "keywords": values["keywords"],
+            "image_urls": values["images"],
+            "video_urls": values["videos"],
+            "audio_urls": values["audios"]
+        }
+        
+        if "enrichmentStatus" in row:
+            article_data["enrichment_status"] = row["enrichmentStatus"]
+        
+        if "activity" in row:
+            article_data["provenance"] = {
+                "activity": row["activity"],
+                "agent": row["agent"],
+                "agent_name": row["agentName"]
             }
-            
-            if "activity" in b:
-                article_data["provenance"] = {
-                    "activity": b["activity"]["value"],
-                    "agent": b["agent"]["value"],
-                    "agent_name": b["agentName"]["value"]
+        
+        chain = {}
+        if "activity" in row and "startTime" in row and "endTime" in row:
+            chain = {
+                "entity": {
+                    "uri": f"{self.namespace}/article/{article_id}",
+                    "type": "NewsArticle"
+                },
+                "activity": {
+                    "uri": row["activity"],
+                    "startTime": row["startTime"],
+                    "endTime": row["endTime"]
+                },
+                "agent": {
+                    "uri": row["agent"],
+                    "name": row["agentName"]
                 }
-            
-            return article_data
-        return None
+            }
+            if values["derivedFrom"]:
+                chain["derived_from"] = values["derivedFrom"]
+            if values["relatedEntities"]:
+                chain["related_entities"] = values["relatedEntities"][:5]
+            if values["wikidataEntities"]:
+                chain["wikidata_entities"] = values["wikidataEntities"][:3]
+        
+        return article_data, chain
     
-    def get_recommendations(self, article_id: str) -> List[Dict]:
-        article_uri = f"{self.namespace}/article/{article_id}"
+    def get_article_with_provenance(self, article_id: str) -> Dict:
+        result = self.execute_sparql(self._article_detail_query([article_id]), "get_article_detail")
+        return self._shape_article_detail(article_id, result)[0]
+    
+    def get_article_and_provenance(self, article_id: str) -> Tuple[Optional[Dict], Dict]:
+        result = self.execute_sparql(self._article_detail_query([article_id]), "get_article_detail")
+        return self._shape_article_detail(article_id, result)
+    
+    def get_articles_by_ids(self, article_ids: List[str]) -> List[Dict]:
+        result = self.execute_sparql(self._article_detail_query(article_ids), "get_articles_by_ids")
+        details = self._shape_article_details(result)
+        return [details[article_id][0] for article_id in article_ids if article_id in details]
+    
+    def get_recommendations(self, article_id: str, limit: int = 5) -> List[Dict]:
+        article_uri = self._article_values([article_id])
         query = f"""
         PREFIX schema: <http://schema.org/>
         
-        SELECT ?article ?title ?author ?publication
+        SELECT DISTINCT ?article ?title ?author ?publication
         WHERE {{
-            <{article_uri}> schema:keywords ?keyword .
+            {article_uri} schema:keywords ?keyword .
             ?article a schema:NewsArticle ;
                      schema:keywords ?keyword ;
                      schema:headline ?title ;
                      schema:author ?author ;
                      schema:publisher ?publication .
-            FILTER(?article != <{article_uri}>)
+            FILTER(?article != {article_uri})
         }}
-        LIMIT 5
+        LIMIT {int(limit)}
         """
-        result = self.execute_sparql(query)
+        result = self.execute_sparql(query, "get_recommendations")
         recommendations = []
         for binding in result.get("results", {}).get("bindings", []):
             recommendations.append({
@@ -302,9 +687,14 @@ class FusekiService:
             })
         return recommendations
     
-    def get_article_rdf(self, article_id: str, format: str = "turtle") -> str:
+    def _article_rdf_query(self, article_id: str) -> str:
         article_uri = f"{self.namespace}/article/{article_id}"
-        query = f"""
+        if self.graph_layout:
+            return f"""
+        CONSTRUCT {{ ?s ?p ?o . }}
+        WHERE {{ GRAPH <{article_uri}> {{ ?s ?p ?o . }} }}
+        """
+        return f"""
         CONSTRUCT {{
             ?s ?p ?o .
         }}
@@ -321,67 +711,187 @@ class FusekiService:
             }}
         }}
         """
+    
+    def get_article_rdf(self, article_id: str, format: str = "turtle") -> str:
         try:
-            sparql = SPARQLWrapper(self.sparql_endpoint)
-            sparql.setQuery(query)
-            if format == "turtle":
-                sparql.setReturnFormat("turtle")
-            elif format == "xml":
-                sparql.setReturnFormat("xml")
-            elif format == "n3":
-                sparql.setReturnFormat("n3")
-            else:
-                sparql.setReturnFormat("turtle")
-            return sparql.query().convert().decode('utf-8')
-        except:
+            with self._timer("get_article_rdf"):
+                return self.storage.construct(self._article_rdf_query(article_id), format)
+        except Exception:
             return None
     
-    def get_statistics(self) -> Dict:
+    def get_articles_graph_chunk(self, after: Optional[str], chunk_size: int) -> Tuple[Graph, Optional[str]]:
+        after_filter = f'FILTER(STR(?article) > "{escape_sparql(after)}")' if after else ""
+        triples_pattern = self._article_graph_pattern() if self.graph_layout else """{
+                ?article ?p ?o .
+                BIND(?article AS ?s)
+            }
+            UNION
+            {
+                ?article prov:wasGeneratedBy|prov:wasInfluencedBy ?activity .
+                ?activity ?p ?o .
+                BIND(?activity AS ?s)
+            }"""
+        query = f"""
+        PREFIX prov: <http://www.w3.org/ns/prov#>
+        PREFIX schema: <http://schema.org/>
+        
+        CONSTRUCT {{
+            ?s ?p ?o .
+        }}
+        WHERE {{
+            {{
+                SELECT ?article
+                WHERE {{
+                    ?article a schema:NewsArticle .
+                    {after_filter}
+                }}
+                ORDER BY STR(?article)
+                LIMIT {int(chunk_size)}
+            }}
+            {triples_pattern}
+        }}
+        """
+        with self._timer("get_articles_graph_chunk"):
+            data = self.storage.construct(query, "nt")
+        graph = Graph()
+        graph.parse(data=data, format="nt")
+        
+        articles = [str(a) for a in graph.subjects(RDF.type, URIRef("http://schema.org/NewsArticle"))]
+        return graph, max(articles) if articles else None
+    
+    @staticmethod
+    def parse_export_bound(value: str) -> str:
+        try:
+            bound = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"Invalid date: {value}")
+        if bound.tzinfo is None:
+            return bound.isoformat() + "Z"
+        return bound.isoformat()
+    
+    def _export_page_query(self, limit: int, cursor: Optional[str] = None,
+                           since: Optional[str] = None, until: Optional[str] = None) -> str:
+        filters = []
+        if since:
+            filters.append(f'?created >= "{self.parse_export_bound(since)}"^^xsd:dateTime')
+        if until:
+            filters.append(f'?created < "{self.parse_export_bound(until)}"^^xsd:dateTime')
+        if cursor:
+            created, article_id = self.decode_cursor(cursor)
+            article_uri = f"{self.namespace}/article/{article_id}"
+            filters.append(f"""(?created > "{created}"^^xsd:dateTime ||
+                       (?created = "{created}"^^xsd:dateTime && STR(?article) > "{article_uri}"))""")
+        page_filter = f"FILTER({' && '.join(filters)})" if filters else ""
+        
+        return f"""
+        PREFIX schema: <http://schema.org/>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+        
+        SELECT ?article ?created
+        WHERE {{
+            ?article a schema:NewsArticle ;
+                     schema:dateCreated ?created .
+            {page_filter}
+        }}
+        ORDER BY ?created STR(?article)
+        LIMIT {int(limit)}
+        """
+    
+    def get_export_page(self, limit: int, cursor: Optional[str] = None,
+                        since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        rows = self._iter_rows(self._export_page_query(limit, cursor, since, until), "get_export_page")
+        return [{"id": row["article"].split("/")[-1], "created_at": row["created"]} for row in rows]
+    
+    @staticmethod
+    def _article_graph_pattern() -> str:
+        return "GRAPH ?article { ?s ?p ?o . }"
+    
+    def _export_triples_query(self, article_ids: List[str]) -> str:
+        if self.graph_layout:
+            return f"""
+        SELECT ?s ?p ?o ?g
+        WHERE {{
+            VALUES ?article {{ {self._article_values(article_ids)} }}
+            {self._article_graph_pattern()}
+            BIND(?article AS ?g)
+        }}
+        """
+        return f"""
+        PREFIX prov: <http://www.w3.org/ns/prov#>
+        
+        SELECT ?article ?s ?p ?o
+        WHERE {{
+            VALUES ?article {{ {self._article_values(article_ids)} }}
+            {{
+                ?article ?p ?o .
+                BIND(?article AS ?s)
+            }}
+            UNION
+            {{
+                ?article prov:wasGeneratedBy|prov:wasInfluencedBy ?s .
+                ?s ?p ?o .
+            }}
+            UNION
+            {{
+                ?article (prov:wasGeneratedBy|prov:wasInfluencedBy)/prov:wasAssociatedWith ?s .
+                ?s ?p ?o .
+            }}
+        }}
+        """
+    
+    def iter_export_bindings(self, article_ids: List[str]) -> Iterator[Dict[str, Dict]]:
+        with self._timer("get_export_triples"):
+            _, bindings = self.storage.select_bindings(self._export_triples_query(article_ids))
+        return bindings
+    
+    @staticmethod
+    def _shape_statistic(key: str, result: Dict):
+        bindings = result.get("results", {}).get("bindings", [])
+        if key in ["total_articles", "total_authors"]:
+            return int(bindings[0]["count"]["value"]) if bindings else 0
+        return [
+            {k: b[k]["value"] for k in b.keys()}
+            for b in bindings
+        ]
+    
+    def get_statistics_tables(self) -> Dict:
         queries = {
-            "total_articles": """
-                PREFIX schema: <http://schema.org/>
-                SELECT (COUNT(?article) AS ?count)
-                WHERE { ?article a schema:NewsArticle . }
-            """,
-            "total_authors": """
+            "authors": """
                 PREFIX schema: <http://schema.org/>
-                SELECT (COUNT(DISTINCT ?author) AS ?count)
-                WHERE { ?article a schema:NewsArticle ; schema:author ?author . }
+                SELECT ?value (COUNT(?article) AS ?count)
+                WHERE { ?article a schema:NewsArticle ; schema:author ?value . }
+                GROUP BY ?value
             """,
-            "articles_by_language": """
+            "languages": """
                 PREFIX schema: <http://schema.org/>
-                SELECT ?language (COUNT(?article) AS ?count)
-                WHERE { ?article a schema:NewsArticle ; schema:inLanguage ?language . }
-                GROUP BY ?language
+                SELECT ?value (COUNT(?article) AS ?count)
+                WHERE { ?article a schema:NewsArticle ; schema:inLanguage ?value . }
+                GROUP BY ?value
             """,
-            "top_keywords": """
+            "keywords": """
                 PREFIX schema: <http://schema.org/>
-                SELECT ?keyword (COUNT(?article) AS ?count)
-                WHERE { ?article a schema:NewsArticle ; schema:keywords ?keyword . }
-                GROUP BY ?keyword
-                ORDER BY DESC(?count)
-                LIMIT 10
+                SELECT ?value (COUNT(?article) AS ?count)
+                WHERE { ?article a schema:NewsArticle ; schema:keywords ?value . }
+                GROUP BY ?value
             """
         }
         
-        stats = {}
+        tables = {"total_articles": self._shape_statistic(
+            "total_articles", self.execute_sparql(self.STATISTICS_QUERIES["total_articles"], "statistics_total_articles")
+        )}
         for key, query in queries.items():
-            result = self.execute_sparql(query)
-            bindings = result.get("results", {}).get("bindings", [])
-            if key in ["total_articles", "total_authors"]:
-                stats[key] = int(bindings[0]["count"]["value"]) if bindings else 0
-            else:
-                stats[key] = [
-                    {k: b[k]["value"] for k in b.keys()}
-                    for b in bindings
-                ]
-        
-        return stats
+            tables[key] = {
+                row["value"]: int(row["count"])
+                for row in self._binding_values(self.execute_sparql(query, f"statistics_{key}"))
+                if "value" in row
+            }
+        return tables
     
-    def search_articles(self, search_term: str, language: str = None) -> List[Dict]:
-        lang_filter = f'FILTER(?language = "{language}")' if language else ""
+    def _search_query(self, search_term: str, language: str = None, limit: int = 20, offset: int = 0) -> str:
+        search_term = escape_sparql(search_term)
+        lang_filter = f'FILTER(?language = "{escape_sparql(language)}")' if language else ""
         
-        query = f"""
+        return f"""
         PREFIX schema: <http://schema.org/>
         
         SELECT ?article ?title ?author ?content ?publication ?language
@@ -399,10 +909,13 @@ class FusekiService:
             )
             {lang_filter}
         }}
-        LIMIT 20
+        ORDER BY ?article
+        LIMIT {int(limit)}
+        OFFSET {int(offset)}
         """
-        
-        result = self.execute_sparql(query)
+    
+    @staticmethod
+    def _shape_search_results(result: Dict) -> List[Dict]:
         articles = []
         for binding in result.get("results", {}).get("bindings", []):
             articles.append({
@@ -415,76 +928,48 @@ class FusekiService:
             })
         return articles
     
-    def get_full_provenance_chain(self, article_id: str) -> Dict:
-        article_uri = f"{self.namespace}/article/{article_id}"
-        query = f"""
+    def search_articles(self, search_term: str, language: str = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+        result = self.execute_sparql(self._search_query(search_term, language, limit, offset), "search_articles")
+        return self._shape_search_results(result)
+    
+    def _lineage_query(self, article_id: str = None) -> str:
+        scope = ""
+        root = ""
+        if article_id:
+            article_uri = self._article_values([article_id])
+            scope = f"""
+                {{ {article_uri} (prov:wasDerivedFrom|prov:wasRevisionOf)* ?child . }}
+                UNION
+                {{ ?parent (prov:wasDerivedFrom|prov:wasRevisionOf)* {article_uri} . }}
+            """
+            root = f"""
+            UNION
+            {{
+                {article_uri} a schema:NewsArticle ;
+                    dc:title ?childTitle .
+                BIND({article_uri} AS ?child)
+            }}"""
+        return f"""
         PREFIX prov: <http://www.w3.org/ns/prov#>
+        PREFIX dc: <http://purl.org/dc/elements/1.1/>
         PREFIX schema: <http://schema.org/>
-        PREFIX wep: <http://example.org/wep/>
         
-        SELECT ?activity ?agent ?agentName ?startTime ?endTime
-               ?derivedFrom ?relatedEntity ?wikidataEntity
+        SELECT DISTINCT ?child ?relation ?parent ?childTitle ?parentTitle
         WHERE {{
-            <{article_uri}> prov:wasGeneratedBy ?activity .
-            ?activity prov:wasAssociatedWith ?agent ;
-                      prov:startedAtTime ?startTime ;
-                      prov:endedAtTime ?endTime .
-            ?agent schema:name ?agentName .
-            
-            OPTIONAL {{ <{article_uri}> prov:wasDerivedFrom ?derivedFrom . }}
-            OPTIONAL {{ <{article_uri}> wep:relatedEntity ?relatedEntity . }}
-            OPTIONAL {{ <{article_uri}> wep:wikidataEntity ?wikidataEntity . }}
+            {{
+                {scope}
+                VALUES ?relation {{ prov:wasDerivedFrom prov:wasRevisionOf }}
+                ?child a schema:NewsArticle ;
+                    ?relation ?parent .
+                OPTIONAL {{ ?child dc:title ?childTitle . }}
+                OPTIONAL {{ ?parent dc:title ?parentTitle . }}
+            }}{root}
         }}
         """
-        
-        result = self.execute_sparql(query)
-        bindings = result.get("results", {}).get("bindings", [])
-        
-        if bindings:
-            b = bindings[0]
-            chain = {
-                "entity": {
-                    "uri": article_uri,
-                    "type": "NewsArticle"
-                },
-                "activity": {
-                    "uri": b["activity"]["value"],
-                    "startTime": b["startTime"]["value"],
-                    "endTime": b["endTime"]["value"]
-                },
-                "agent": {
-                    "uri": b["agent"]["value"],
-                    "name": b["agentName"]["value"]
-                }
-            }
-            
-            derived_from = []
-            related_entities = []
-            wikidata_entities = []
-            
-            for binding in bindings:
-                if "derivedFrom" in binding:
-                    uri = binding["derivedFrom"]["value"]
-                    if uri not in derived_from:
-                        derived_from.append(uri)
-                
-                if "relatedEntity" in binding:
-                    uri = binding["relatedEntity"]["value"]
-                    if uri not in related_entities:
-                        related_entities.append(uri)
-                
-                if "wikidataEntity" in binding:
-                    uri = binding["wikidataEntity"]["value"]
-                    if uri not in wikidata_entities:
-                        wikidata_entities.append(uri)
-            
-            if derived_from:
-                chain["derived_from"] = derived_from
-            if related_entities:
-                chain["related_entities"] = related_entities[:5]
-            if wikidata_entities:
-                chain["wikidata_entities"] = wikidata_entities[:3]
-            
-            return chain
-        
-        return {}
+    
+    def get_lineage_rows(self, article_id: str = None) -> List[Dict]:
+        return self._binding_values(self.execute_sparql(self._lineage_query(article_id), "get_lineage"))
+    
+    def get_full_provenance_chain(self, article_id: str) -> Dict:
+        result = self.execute_sparql(self._article_detail_query([article_id], include_content=False), "get_provenance_chain")
+        return self._shape_article_detail(article_id, result)[1]
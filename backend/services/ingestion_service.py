@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+
+from services.dbpedia_service import DBpediaService
+from services.fuseki_service import FusekiService
+from services.enrichment_service import EnrichmentQueue
+
+class BulkIngestor:
+    def __init__(self, dbpedia_service: DBpediaService, fuseki_service: FusekiService,
+                 enrichment_queue: EnrichmentQueue, concurrency: int = None, batch_size: int = None):
+        self.dbpedia = dbpedia_service
+        self.fuseki = fuseki_service
+        self.enrichment_queue = enrichment_queue
+        self.concurrency = concurrency or int(os.getenv("BULK_ENRICHMENT_CONCURRENCY", "8"))
+        self.batch_size = batch_size or int(os.getenv("BULK_BATCH_SIZE", "500"))
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bulk-enrichment")
+
+    def _enrich(self, article_data: Dict) -> Dict:
+        try:
+            enriched = self.dbpedia.enrich_article(dict(article_data), strict=True)
+            enriched["enrichment_status"] = "completed"
+            return enriched
+        except Exception:
+            return {**article_data, "enrichment_status": "pending"}
+
+    def ingest_batch(self, records: List[Tuple[int, Dict]], enrich: bool = True) -> Tuple[List[Dict], List[Dict]]:
+        articles_data = [article_data for _, article_data in records]
+        if enrich:
+            articles_data = list(self.executor.map(self._enrich, articles_data))
+        else:
+            articles_data = [{**article_data, "enrichment_status": "pending"} for article_data in articles_data]
+
+        created = self.fuseki.create_articles(articles_data)
+
+        report = []
+        articles = []
+        for (index, _), article_data, article in zip(records, articles_data, created):
+            if article is None:
+                report.append({"index": index, "status": "failed", "error": "Failed to insert article"})
+                continue
+            report.append({"index": index, "status": "created", "id": article["id"],
+                           "enrichment_status": article["enrichment_status"]})
+            articles.append(article)
+            if article["enrichment_status"] == "pending":
+                self.enrichment_queue.submit(article["id"], article_data)
+
+        return report, articles
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import deque
+from typing import List, Dict, Optional
+
+class LineageIndex:
+    RELATIONS = ("wasDerivedFrom", "wasRevisionOf")
+
+    def __init__(self, namespace: str, max_depth: int = None, max_nodes: int = None):
+        self.article_prefix = f"{namespace}/article/"
+        self.max_depth = max_depth or int(os.getenv("LINEAGE_MAX_DEPTH", "50"))
+        self.max_nodes = max_nodes or int(os.getenv("LINEAGE_MAX_NODES", "5000"))
+        self.lock = threading.Lock()
+        self.built = False
+        self.titles = {}
+        self.parents = {}
+        self.children = {}
+
+    def _uri(self, article_id: str) -> str:
+        return self.article_prefix + article_id
+
+    def _add_edge(self, child: str, relation: str, parent: str):
+        relation = relation.rsplit("#", 1)[-1]
+        edges = self.parents.setdefault(child, [])
+        if (parent, relation) not in edges:
+            edges.append((parent, relation))
+            self.children.setdefault(parent, []).append((child, relation))
+
+    def build(self, rows: List[Dict], articles: List[Dict] = None):
+        with self.lock:
+            self.titles = {}
+            self.parents = {}
+            self.children = {}
+        self.add_rows(rows)
+        with self.lock:
+            for article in articles or []:
+                self.titles[self._uri(article["id"])] = article["title"]
+            self.built = True
+
+    def add_rows(self, rows: List[Dict]):
+        with self.lock:
+            for row in rows:
+                if row.get("childTitle"):
+                    self.titles[row["child"]] = row["childTitle"]
+                if row.get("parentTitle"):
+                    self.titles[row["parent"]] = row["parentTitle"]
+                if row.get("relation"):
+                    self._add_edge(row["child"], row["relation"], row["parent"])
+
+    def add_article(self, article: Dict):
+        uri = self._uri(article["id"])
+        with self.lock:
+            self.titles[uri] = article["title"]
+            for derivation in article.get("derivations") or []:
+                self._add_edge(uri, derivation["relation"], derivation["source"])
+
+    def remove_article(self, article_id: str):
+        uri = self._uri(article_id)
+        with self.lock:
+            self.titles.pop(uri, None)
+            # edges from derived articles stay, the store keeps their references to the URI
+            for parent, relation in self.parents.pop(uri, []):
+                siblings = self.children.get(parent, [])
+                if (uri, relation) in siblings:
+                    siblings.remove((uri, relation))
+                if not siblings:
+                    self.children.pop(parent, None)
+
+    def neighbours(self, article_id: str) -> List[str]:
+        uri = self._uri(article_id)
+        with self.lock:
+            uris = [parent for parent, _ in self.parents.get(uri, [])]
+            uris += [child for child, _ in self.children.get(uri, [])]
+        return [u[len(self.article_prefix):] for u in uris if u.startswith(self.article_prefix)]
+
+    def __contains__(self, article_id: str) -> bool:
+        return self._uri(article_id) in self.titles
+
+    def _node(self, uri: str, role: str, depth: int) -> Dict:
+        article_id = uri[len(self.article_prefix):] if uri.startswith(self.article_prefix) else None
+        return {"uri": uri, "id": article_id, "title": self.titles.get(uri), "role": role, "depth": depth}
+
+    def lineage(self, article_id: str, depth: int = 10, max_nodes: int = 500) -> Optional[Dict]:
+        root = self._uri(article_id)
+        depth = max(0, min(depth, self.max_depth))
+        max_nodes = max(1, min(max_nodes, self.max_nodes))
+
+        with self.lock:
+            if root not in self.titles:
+                return None
+
+            nodes = {root: self._node(root, "self", 0)}
+            edges = []
+            truncated = False
+            for role, adjacency in (("ancestor", self.parents), ("descendant", self.children)):
+                frontier = deque([(root, 0)])
+                while frontier:
+                    uri, level = frontier.popleft()
+                    for other, relation in adjacency.get(uri, []):
+                        if other not in nodes:
+                            if level >= depth or len(nodes) >= max_nodes:
+                                truncated = True
+                                continue
+                            nodes[other] = self._node(other, role, level + 1)
+                            frontier.append((other, level + 1))
+                        if role == "ancestor":
+                            edges.append({"from": uri, "to": other, "relation": relation})
+                        else:
+                            edges.append({"from": other, "to": uri, "relation": relation})
+
+        return {
+            "root": root,
+            "nodes": list(nodes.values()),
+            "edges": edges,
+            "node_count": len(nodes),
+            "edge_count": len(edges),
+            "truncated": truncated
+        }
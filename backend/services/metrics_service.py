@@ -0,0 +1,156 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Dict[str, str] = None) -> str:
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.help = {}
+        self.types = {}
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.collectors = {}
+
+    def _register(self, name: str, kind: str, help_text: str):
+        if name not in self.types:
+            self.types[name] = kind
+            self.help[name] = help_text
+
+    def counter(self, name: str, help_text: str):
+        self._register(name, "counter", help_text)
+        self.counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str):
+        self._register(name, "histogram", help_text)
+        self.histograms.setdefault(name, {})
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]):
+        self._register(name, "gauge", help_text)
+        self.gauges[name] = collect
+
+    def collect(self, name: str, collect: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]):
+        self.collectors.setdefault(name, []).append(collect)
+
+    def _counter_snapshot(self) -> Dict[str, Dict]:
+        with self.lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+        for name, collectors in self.collectors.items():
+            for collect in collectors:
+                try:
+                    samples = collect()
+                except Exception as e:
+                    print(f"Metrics collection failed for {name}: {e}")
+                    continue
+                series = counters.setdefault(name, {})
+                for key, value in samples.items():
+                    series[key] = series.get(key, 0) + value
+        return counters
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for position, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry["buckets"][position] += 1
+            entry["sum"] += seconds
+            entry["count"] += 1
+
+    @contextmanager
+    def timer(self, name: str, errors: str = None, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            if errors:
+                self.inc(errors, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        lines = []
+        counters = self._counter_snapshot()
+        with self.lock:
+            histograms = {
+                name: {key: {"buckets": list(entry["buckets"]), "sum": entry["sum"], "count": entry["count"]}
+                       for key, entry in series.items()}
+                for name, series in self.histograms.items()
+            }
+
+        for name, kind in self.types.items():
+            lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for key, value in counters.get(name, {}).items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            elif kind == "histogram":
+                for key, entry in histograms.get(name, {}).items():
+                    for bound, count in zip(self.buckets, entry["buckets"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, {'le': _format_value(bound)})} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {entry['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(entry['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {entry['count']}")
+            else:
+                try:
+                    samples = self.gauges[name]()
+                except Exception as e:
+                    print(f"Metrics collection failed for {name}: {e}")
+                    samples = {}
+                for key, value in samples.items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+metrics.histogram("wep_http_request_duration_seconds", "HTTP request latency by route and method.")
+metrics.counter("wep_http_requests_total", "HTTP requests by route, method and status code.")
+metrics.histogram("wep_fuseki_query_duration_seconds", "Fuseki query and update latency by logical query name.")
+metrics.counter("wep_fuseki_errors_total", "Failed Fuseki queries and updates by logical query name.")
+metrics.histogram("wep_upstream_duration_seconds", "DBpedia Spotlight, DBpedia SPARQL and Wikidata request latency.")
+metrics.counter("wep_upstream_errors_total", "Failed DBpedia Spotlight, DBpedia SPARQL and Wikidata requests.")
+metrics.counter("wep_upstream_rejected_total", "Upstream calls refused by an open circuit breaker.")
+metrics.counter("wep_upstream_hedges_total", "Hedged second attempts sent to slow upstreams.")
+metrics.histogram("wep_operation_duration_seconds", "Duration of in-process work such as SHACL validation and index builds.")
+metrics.counter("wep_cache_hits_total", "Cache hits by cache name.")
+metrics.counter("wep_cache_misses_total", "Cache misses by cache name.")
+
+def _cache_hit_ratios() -> Dict[Tuple[Tuple[str, str], ...], float]:
+    counters = metrics._counter_snapshot()
+    hits = counters.get("wep_cache_hits_total", {})
+    misses = counters.get("wep_cache_misses_total", {})
+    ratios = {}
+    for key in set(hits) | set(misses):
+        total = hits.get(key, 0) + misses.get(key, 0)
+        if total:
+            ratios[key] = hits.get(key, 0) / total
+    return ratios
+
+metrics.gauge("wep_cache_hit_ratio", "Cache hit ratio since process start by cache name.", _cache_hit_ratios)
@@ -1,35 +1,115 @@
 import os
 import qrcode
+import qrcode.image.svg
 import io
 import base64
-from typing import Dict
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+
+QR_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml"
+}
+
+SHEET_MEDIA_TYPES = {
+    "png": "image/png",
+    "pdf": "application/pdf"
+}
 
 class QRCodeService:
-    
+    def __init__(self, cache_size: int = None):
+        # sized here rather than at import time, so the value from .env applies
+        self.cache_size = cache_size or int(os.getenv("QR_CACHE_SIZE", "10000"))
+        self._render = lru_cache(maxsize=self.cache_size)(self._render_image)
+
     @staticmethod
-    def generate_qr_code(article_id: str) -> str:
-        frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
-        url = f"{frontend_url}/articles/{article_id}"
-        
-        qr = qrcode.QRCode(version=1, box_size=10, border=4)
-        qr.add_data(url)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
+    def article_url(article_id: str, frontend_url: str = None) -> str:
+        frontend_url = frontend_url or os.getenv("FRONTEND_URL", "http://localhost:3000")
+        return f"{frontend_url}/articles/{article_id}"
+
+    def generate_qr_code(self, article_id: str) -> str:
+        _, body, _ = self.render(article_id, "png")
+        img_base64 = base64.b64encode(body).decode()
         return f"data:image/png;base64,{img_base64}"
-    
-    @staticmethod
-    def generate_qr_info(article_id: str) -> Dict:
-        frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
-        qr_data = QRCodeService.generate_qr_code(article_id)
+
+    def generate_qr_info(self, article_id: str) -> Dict:
         return {
             "article_id": article_id,
-            "qr_code": qr_data,
-            "url": f"{frontend_url}/articles/{article_id}"
+            "qr_code": self.generate_qr_code(article_id),
+            "url": self.article_url(article_id)
         }
+
+    def render(self, article_id: str, format: str = "png", frontend_url: str = None) -> Tuple[str, bytes, str]:
+        if format not in QR_MEDIA_TYPES:
+            raise ValueError(f"Unsupported QR format: {format}")
+        frontend_url = frontend_url or os.getenv("FRONTEND_URL", "http://localhost:3000")
+        return self._render(article_id, format, frontend_url)
+
+    @staticmethod
+    def _render_image(article_id: str, format: str, frontend_url: str) -> Tuple[str, bytes, str]:
+        qr = qrcode.QRCode(version=1, box_size=10, border=4)
+        qr.add_data(QRCodeService.article_url(article_id, frontend_url))
+        qr.make(fit=True)
+
+        buffer = io.BytesIO()
+        if format == "svg":
+            qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+        else:
+            qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+
+        body = buffer.getvalue()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        return etag, body, QR_MEDIA_TYPES[format]
+
+    @staticmethod
+    def headers(etag: str) -> Dict[str, str]:
+        max_age = int(os.getenv("QR_CACHE_MAX_AGE", "86400"))
+        return {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+class QRSheetRenderer:
+    def __init__(self, qr_service: QRCodeService, workers: int = None, columns: int = 4, tile_size: int = 300, label_height: int = 40):
+        self.qr_service = qr_service
+        self.workers = workers or int(os.getenv("QR_SHEET_WORKERS", "4"))
+        self.columns = columns
+        self.tile_size = tile_size
+        self.label_height = label_height
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qr-sheet")
+
+    def _tile(self, article_id: str) -> Image.Image:
+        _, body, _ = self.qr_service.render(article_id, "png")
+        image = Image.open(io.BytesIO(body)).convert("RGB")
+        return image.resize((self.tile_size, self.tile_size), Image.NEAREST)
+
+    def render_sheet(self, article_ids: List[str], labels: Optional[Dict[str, str]] = None,
+                     columns: int = None, format: str = "png") -> bytes:
+        if format not in SHEET_MEDIA_TYPES:
+            raise ValueError(f"Unsupported sheet format: {format}")
+        if not article_ids:
+            raise ValueError("No article ids given")
+        labels = labels or {}
+        columns = max(1, min(columns or self.columns, len(article_ids)))
+        rows = (len(article_ids) + columns - 1) // columns
+        cell_height = self.tile_size + self.label_height
+
+        sheet = Image.new("RGB", (columns * self.tile_size, rows * cell_height), "white")
+        draw = ImageDraw.Draw(sheet)
+        font = ImageFont.load_default()
+
+        for position, (article_id, tile) in enumerate(zip(article_ids, self.executor.map(self._tile, article_ids))):
+            x = (position % columns) * self.tile_size
+            y = (position // columns) * cell_height
+            sheet.paste(tile, (x, y))
+            label = labels.get(article_id, article_id)
+            if len(label) > 45:
+                label = label[:42] + "..."
+            draw.text((x + 10, y + self.tile_size + 10), label, fill="black", font=font)
+
+        buffer = io.BytesIO()
+        sheet.save(buffer, format=format.upper())
+        return buffer.getvalue()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
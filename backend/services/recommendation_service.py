@@ -1,47 +1,138 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+import threading
+import time
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+import scipy.sparse as sp
 import numpy as np
 from typing import List, Dict
 
-class RecommendationService:
-    
+from services.metrics_service import metrics
+
+class RecommendationIndex:
+
+    def __init__(self, n_features: int = 2 ** 18, neighbours_k: int = 20, refit_ratio: float = None):
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            stop_words='english',
+            alternate_sign=False,
+            norm=None
+        )
+        self.lock = threading.Lock()
+        self.articles = []
+        self.positions = {}
+        self.rows = []
+        self.df = np.zeros(n_features, dtype=np.float64)
+        self.matrix = None
+        self.idf = None
+        self.pending = []
+        self.fitted_docs = 0
+        self.refit_ratio = refit_ratio if refit_ratio is not None else float(os.getenv("RECOMMENDATION_REFIT_RATIO", "0.1"))
+        self.neighbours = {}
+        self.neighbours_k = neighbours_k
+        self.built = False
+
     @staticmethod
-    def get_ml_recommendations(current_article: Dict, all_articles: List[Dict], limit: int = 5) -> List[Dict]:
-        if len(all_articles) < 2:
-            return []
-        
-        current_text = f"{current_article['title']} {current_article['content']} {' '.join(current_article.get('keywords', []))}"
-        
-        articles_data = []
-        for article in all_articles:
-            if article['id'] != current_article['id']:
-                text = f"{article['title']} {article['content']} {' '.join(article.get('keywords', []))}"
-                articles_data.append({
-                    'id': article['id'],
-                    'title': article['title'],
-                    'author': article['author'],
-                    'publication': article['publication'],
-                    'text': text
-                })
-        
-        if not articles_data:
+    def _article_text(article: Dict) -> str:
+        return f"{article['title']} {article['content']} {' '.join(article.get('keywords', []))}"
+
+    def build(self, all_articles: List[Dict]):
+        with self.lock, metrics.timer("wep_operation_duration_seconds", operation="recommendation_build"):
+            self.articles = []
+            self.positions = {}
+            self.rows = []
+            self.df[:] = 0
+            self.matrix = None
+            self.pending = []
+            self.neighbours = {}
+            for article in all_articles:
+                self._add(article)
+            self.built = True
+
+    def add_article(self, article: Dict):
+        with self.lock:
+            self._add(article)
+
+    def _add(self, article: Dict):
+        if article['id'] in self.positions:
+            return
+        counts = self.vectorizer.transform([self._article_text(article)]).tocsr()
+        self.df[counts.indices] += 1
+        self.positions[article['id']] = len(self.articles)
+        self.articles.append({
+            'id': article['id'],
+            'title': article['title'],
+            'author': article['author'],
+            'publication': article['publication']
+        })
+        self.rows.append(counts)
+        if self.matrix is not None:
+            # weighted with the idf of the last fit until the corpus has drifted enough to refit
+            self.pending.append(normalize(counts.multiply(self.idf).tocsr()))
+
+    def remove_article(self, article_id: str):
+        with self.lock:
+            position = self.positions.pop(article_id, None)
+            if position is None:
+                return
+            self.df[self.rows[position].indices] -= 1
+            # fresh lists, readers scoring against an older matrix keep the list that matches it
+            articles = list(self.articles)
+            rows = list(self.rows)
+            # the last row fills the gap so the other positions stay put
+            last = len(articles) - 1
+            if position != last:
+                articles[position] = articles[last]
+                rows[position] = rows[last]
+                self.positions[articles[position]['id']] = position
+            articles.pop()
+            rows.pop()
+            self.articles = articles
+            self.rows = rows
+            self.matrix = None
+            self.pending = []
+            self.neighbours = {
+                key: [r for r in neighbours if r['id'] != article_id]
+                for key, neighbours in self.neighbours.items() if key != article_id
+            }
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self.positions
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def _get_matrix(self):
+        # df drifts with every appended row, past refit_ratio of the fitted corpus the idf is refreshed
+        if self.matrix is not None and len(self.articles) - self.fitted_docs > self.refit_ratio * self.fitted_docs:
+            self.matrix = None
+        if self.matrix is None:
+            with metrics.timer("wep_operation_duration_seconds", operation="recommendation_fit"):
+                n_docs = len(self.articles)
+                self.idf = np.log((1 + n_docs) / (1 + self.df)) + 1
+                weighted = sp.vstack(self.rows).tocsr().multiply(self.idf).tocsr()
+                self.matrix = normalize(weighted)
+                self.fitted_docs = n_docs
+                self.pending = []
+        elif self.pending:
+            self.matrix = sp.vstack([self.matrix] + self.pending, format="csr")
+            self.pending = []
+        return self.matrix
+
+    @staticmethod
+    def _top_k(articles: List[Dict], similarities, position: int, limit: int) -> List[Dict]:
+        similarities[position] = -1
+        limit = min(limit, len(similarities) - 1)
+        if limit <= 0:
             return []
         
-        all_texts = [current_text] + [a['text'] for a in articles_data]
-        
-        vectorizer = TfidfVectorizer(stop_words='english', max_features=50, min_df=1)
-        tfidf_matrix = vectorizer.fit_transform(all_texts)
-        
-        similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
-        
-        print(f"Similarities: {similarities}")
-        
-        top_indices = similarities.argsort()[-limit:][::-1]
+        top_indices = np.argpartition(similarities, -limit)[-limit:]
+        top_indices = top_indices[np.argsort(similarities[top_indices])[::-1]]
         
         recommendations = []
         for idx in top_indices:
             if similarities[idx] > 0.01:
-                article = articles_data[idx]
+                article = articles[idx]
                 recommendations.append({
                     'id': article['id'],
                     'title': article['title'],
@@ -51,3 +142,56 @@ class RecommendationService:
                 })
         
         return recommendations
+
+    def get_recommendations(self, article_id: str, limit: int = 5) -> List[Dict]:
+        with self.lock:
+            cached = self.neighbours.get(article_id)
+        if cached is not None and limit <= self.neighbours_k:
+            return cached[:limit]
+        return self.get_batch_recommendations([article_id], limit).get(article_id, [])
+
+    def get_batch_recommendations(self, article_ids: List[str], limit: int = 5,
+                                  chunk_size: int = 256) -> Dict[str, List[Dict]]:
+        with self.lock:
+            if len(self.articles) < 2:
+                return {}
+            matrix = self._get_matrix()
+            articles = self.articles
+            positions = [self.positions[a] for a in article_ids if a in self.positions]
+        
+        if not positions:
+            return {}
+        
+        # the dense block is chunk_size x corpus size, whatever the number of ids
+        results = {}
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start:start + chunk_size]
+            similarities = (matrix[chunk] @ matrix.T).toarray()
+            for row, position in zip(similarities, chunk):
+                results[articles[position]['id']] = self._top_k(articles, row, position, limit)
+        return results
+
+    def refresh_neighbours(self, chunk_size: int = 256):
+        with self.lock:
+            ids = [a['id'] for a in self.articles]
+        
+        neighbours = {}
+        with metrics.timer("wep_operation_duration_seconds", operation="recommendation_refresh"):
+            for start in range(0, len(ids), chunk_size):
+                neighbours.update(self.get_batch_recommendations(ids[start:start + chunk_size], self.neighbours_k))
+        
+        with self.lock:
+            self.neighbours = neighbours
+
+    def start_background_refresh(self, interval: int):
+        def run():
+            while True:
+                try:
+                    self.refresh_neighbours()
+                except Exception as e:
+                    print(f"Neighbour table refresh failed: {e}")
+                time.sleep(interval)
+        
+        thread = threading.Thread(target=run, name="recommendation-refresh", daemon=True)
+        thread.start()
+        return thread
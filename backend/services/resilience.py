@@ -0,0 +1,131 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeout, wait
+from typing import Any, Callable, Dict, Tuple
+
+from services.metrics_service import metrics
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+class BudgetExhaustedError(TimeoutError):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+        self.reset_timeout = reset_timeout or float(os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "30"))
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            # while half open a single probe goes through, everything else keeps failing fast
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != "closed":
+                print(f"Circuit for {self.name} closed")
+            self.state = "closed"
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        with self.lock:
+            self.probing = False
+
+    @contextmanager
+    def guard(self, ignore: Tuple[type, ...] = ()):
+        if not self.allow():
+            metrics.inc("wep_upstream_rejected_total", upstream=self.name)
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+        try:
+            yield
+        except ignore:
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        else:
+            self.record_success()
+        finally:
+            # a probe that was cancelled or ignored proves nothing, the next call probes again
+            self.release()
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            retry_in = None
+            if self.state == "open":
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return {"state": self.state, "failures": self.failures, "retry_in_seconds": retry_in}
+
+class Deadline:
+    def __init__(self, budget: float):
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def timeout(self, timeout: float, minimum: float = 0.0) -> float:
+        remaining = self.remaining()
+        if remaining <= max(minimum, 0.0):
+            raise BudgetExhaustedError("Enrichment time budget exhausted")
+        return min(timeout, remaining)
+
+def hedged(executor: ThreadPoolExecutor, call: Callable[[], Any], delay: float, timeout: float,
+           upstream: str) -> Any:
+    if not delay or delay >= timeout:
+        return call()
+
+    first = executor.submit(call)
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeout:
+        pass
+
+    # the slow attempt keeps running, whichever of the two answers first wins
+    metrics.inc("wep_upstream_hedges_total", upstream=upstream)
+    pending = {first, executor.submit(call)}
+    expires_at = time.monotonic() + timeout - delay
+    error = None
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, expires_at - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"{upstream} did not answer within {timeout:.1f}s")
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+    finally:
+        # attempts still queued behind a busy pool are dropped, running ones end at their own timeout
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,57 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+class ResponseCache:
+    def __init__(self, max_entries: int = None, max_age: int = None):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_SIZE", "5000"))
+        self.max_age = max_age if max_age is not None else int(os.getenv("RESPONSE_CACHE_MAX_AGE", "60"))
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.keys_by_article = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    @staticmethod
+    def encode_json(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def get(self, article_id: str, key: str) -> Optional[Tuple[str, bytes, str]]:
+        with self.lock:
+            entry = self.entries.get((article_id, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((article_id, key))
+            self.hits += 1
+            return entry
+
+    def set(self, article_id: str, key: str, body: bytes, media_type: str) -> Tuple[str, bytes, str]:
+        entry = (self.make_etag(body), body, media_type)
+        with self.lock:
+            self.entries[(article_id, key)] = entry
+            self.entries.move_to_end((article_id, key))
+            self.keys_by_article.setdefault(article_id, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                (old_article, old_key), _ = self.entries.popitem(last=False)
+                keys = self.keys_by_article.get(old_article)
+                if keys:
+                    keys.discard(old_key)
+                    if not keys:
+                        del self.keys_by_article[old_article]
+        return entry
+
+    def invalidate(self, article_id: str):
+        with self.lock:
+            for key in self.keys_by_article.pop(article_id, set()):
+                self.entries.pop((article_id, key), None)
+
+    def headers(self, etag: str) -> Dict[str, str]:
+        return {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}"}
@@ -0,0 +1,175 @@
+import re
+import math
+import heapq
+import bisect
+import os
+import threading
+from collections import Counter, defaultdict
+from typing import List, Dict, Optional
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+class SearchIndex:
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_prefix_terms: int = 20, compact_ratio: float = None):
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_terms = max_prefix_terms
+        self.compact_ratio = compact_ratio if compact_ratio is not None else float(os.getenv("SEARCH_COMPACT_RATIO", "0.25"))
+        self.lock = threading.Lock()
+        self.built = False
+        self._reset()
+
+    def _reset(self):
+        self.documents = []
+        self.positions = {}
+        self.postings = defaultdict(dict)
+        self.vocabulary = []
+        self.doc_lengths = []
+        self.total_length = 0
+        self.languages = defaultdict(set)
+        self.dead = 0
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return TOKEN_PATTERN.findall(text.lower())
+
+    def build(self, all_articles: List[Dict]):
+        with self.lock:
+            self._reset()
+            for article in all_articles:
+                self._add(article)
+            self.built = True
+
+    def add_article(self, article: Dict):
+        with self.lock:
+            self._add(article)
+
+    def remove_article(self, article: Dict):
+        with self.lock:
+            self._remove(article)
+
+    def _remove(self, article: Dict):
+        position = self.positions.pop(article['id'], None)
+        if position is None:
+            return
+        document = self.documents[position]
+        tokens = self.tokenize(f"{document['title']} {article['content']} {document['author']}")
+        for term in set(tokens):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(position, None)
+            if not postings:
+                del self.postings[term]
+                index = bisect.bisect_left(self.vocabulary, term)
+                if index < len(self.vocabulary) and self.vocabulary[index] == term:
+                    del self.vocabulary[index]
+        # the slot stays so other positions remain valid until enough of them are dead to compact
+        self.documents[position] = None
+        self.total_length -= self.doc_lengths[position]
+        self.doc_lengths[position] = 0
+        self.languages[document['language']].discard(position)
+        self.dead += 1
+        if self.dead > self.compact_ratio * len(self.documents):
+            self._compact()
+
+    def _compact(self):
+        # renumbers the live documents, postings left on dead slots are dropped with them
+        remap = {}
+        documents = []
+        doc_lengths = []
+        for position, document in enumerate(self.documents):
+            if document is None:
+                continue
+            remap[position] = len(documents)
+            documents.append(document)
+            doc_lengths.append(self.doc_lengths[position])
+
+        for term in list(self.postings):
+            postings = {remap[p]: freq for p, freq in self.postings[term].items() if p in remap}
+            if postings:
+                self.postings[term] = postings
+            else:
+                del self.postings[term]
+        self.vocabulary = sorted(self.postings)
+
+        self.positions = {article_id: remap[position] for article_id, position in self.positions.items()}
+        self.languages = defaultdict(set)
+        for position, document in enumerate(documents):
+            self.languages[document['language']].add(position)
+        self.documents = documents
+        self.doc_lengths = doc_lengths
+        self.dead = 0
+
+    def _add(self, article: Dict):
+        if article['id'] in self.positions:
+            return
+        tokens = self.tokenize(f"{article['title']} {article['content']} {article['author']}")
+        position = len(self.documents)
+
+        for term, freq in Counter(tokens).items():
+            if term not in self.postings:
+                bisect.insort(self.vocabulary, term)
+            self.postings[term][position] = freq
+
+        self.positions[article['id']] = position
+        self.documents.append({
+            'id': article['id'],
+            'title': article['title'],
+            'author': article['author'],
+            'content': article['content'][:200] + "...",
+            'publication': article['publication'],
+            'language': article['language']
+        })
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        self.languages[article['language']].add(position)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + self.max_prefix_terms]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, language: Optional[str] = None, limit: int = 20, offset: int = 0) -> Dict:
+        terms = self.tokenize(query)
+
+        with self.lock:
+            n_docs = len(self.positions)
+            if not terms or n_docs == 0:
+                return {"results": [], "total": 0}
+
+            if terms[-1] not in self.postings:
+                terms = terms[:-1] + self._expand_prefix(terms[-1])
+
+            allowed = self.languages.get(language, set()) if language else None
+            avg_length = self.total_length / n_docs
+
+            scores = defaultdict(float)
+            for term in set(terms):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for position, freq in postings.items():
+                    if allowed is not None and position not in allowed:
+                        continue
+                    if self.documents[position] is None:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / avg_length)
+                    scores[position] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+            top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])[offset:]
+            results = [
+                {**self.documents[position], 'score': round(score, 4)}
+                for position, score in top
+            ]
+
+        return {"results": results, "total": len(scores)}
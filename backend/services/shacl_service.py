@@ -1,12 +1,23 @@
-from pyshacl import validate
+import os
+import uuid
+import threading
+from datetime import datetime
+from functools import lru_cache
+from collections import Counter, OrderedDict
+from pyshacl import Validator
+from pyshacl.shapes_graph import ShapesGraph
 from rdflib import Graph, Namespace, RDF, RDFS, Literal
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Optional
+
+from services.metrics_service import metrics
 
 PROV = Namespace("http://www.w3.org/ns/prov#")
 SCHEMA = Namespace("http://schema.org/")
 WEP = Namespace("http://example.org/wep/")
 SH = Namespace("http://www.w3.org/ns/shacl#")
 
+INFERENCE_MODES = ("none", "rdfs", "owlrl", "both")
+
 class SHACLService:
     
     @staticmethod
@@ -36,27 +47,145 @@ class SHACLService:
         return g
     
     @staticmethod
-    def validate_rdf(data_graph: Graph) -> Tuple[bool, Graph, str]:
-        shapes_graph = SHACLService.get_shapes_graph()
+    @lru_cache(maxsize=1)
+    def get_compiled_shapes() -> ShapesGraph:
+        shapes = ShapesGraph(SHACLService.get_shapes_graph())
+        shapes.shapes  # property access harvests the shapes
+        return shapes
+    
+    @staticmethod
+    def check_inference(inference: Optional[str]) -> str:
+        inference = inference or os.getenv("SHACL_INFERENCE", "rdfs")
+        if inference not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode: {inference}, expected one of {', '.join(INFERENCE_MODES)}")
+        return inference
+    
+    @staticmethod
+    def validate_rdf(data_graph: Graph, inference: Optional[str] = None) -> Tuple[bool, Graph, str]:
+        inference = SHACLService.check_inference(inference)
+        compiled_shapes = SHACLService.get_compiled_shapes()
         
-        conforms, results_graph, results_text = validate(
+        validator = Validator(
             data_graph,
-            shacl_graph=shapes_graph,
-            inference='rdfs',
-            abort_on_first=False
+            shacl_graph=compiled_shapes.graph,
+            options={
+                "inference": inference,
+                "abort_on_first": False
+            }
         )
+        validator.shacl_graph = compiled_shapes
         
-        return conforms, results_graph, results_text
+        with metrics.timer("wep_operation_duration_seconds", operation="shacl_validate"):
+            return validator.run()
     
     @staticmethod
-    def validate_article_data(article_rdf: str) -> Dict:
+    def validate_article_data(article_rdf: str, inference: Optional[str] = None) -> Dict:
         data_graph = Graph()
         data_graph.parse(data=article_rdf, format="turtle")
         
-        conforms, results_graph, results_text = SHACLService.validate_rdf(data_graph)
+        conforms, results_graph, results_text = SHACLService.validate_rdf(data_graph, inference)
         
         return {
             "conforms": conforms,
             "results_text": results_text,
             "validation_report": results_graph.serialize(format="turtle")
         }
+    
+    @staticmethod
+    def summarize_results(results_graph: Graph) -> list:
+        violations = []
+        for result in results_graph.subjects(RDF.type, SH.ValidationResult):
+            violations.append({
+                "focus_node": str(results_graph.value(result, SH.focusNode)),
+                "path": str(results_graph.value(result, SH.resultPath)),
+                "severity": str(results_graph.value(result, SH.resultSeverity)).split("#")[-1],
+                "message": str(results_graph.value(result, SH.resultMessage))
+            })
+        return violations
+
+
+class DatasetValidator:
+    def __init__(self, fuseki_service, chunk_size: int = None, max_reported: int = 1000, max_jobs: int = None):
+        self.fuseki = fuseki_service
+        self.chunk_size = chunk_size or int(os.getenv("SHACL_BATCH_SIZE", "500"))
+        self.max_reported = max_reported
+        self.lock = threading.Lock()
+        # finished reports are forgotten oldest first, running jobs are always kept
+        self.jobs = OrderedDict()
+        self.max_jobs = max_jobs or int(os.getenv("SHACL_JOBS_MAX", "100"))
+    
+    def start(self, inference: Optional[str] = None) -> Dict:
+        # rejected here, a bad mode would otherwise only surface as a failed job
+        inference = SHACLService.check_inference(inference)
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": "running",
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "finished_at": None,
+            "articles_validated": 0,
+            "nonconforming_articles": 0,
+            "violations_by_path": {},
+            "violations": [],
+            "error": None
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+            self._trim()
+        threading.Thread(target=self._run, args=(job_id, inference), name=f"shacl-{job_id}", daemon=True).start()
+        return self.get(job_id)
+    
+    def _trim(self):
+        excess = len(self.jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = []
+        for job_id, job in self.jobs.items():
+            if job["status"] != "running":
+                finished.append(job_id)
+                if len(finished) >= excess:
+                    break
+        for job_id in finished:
+            del self.jobs[job_id]
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            report = dict(job)
+            report["conforms"] = job["status"] == "completed" and job["nonconforming_articles"] == 0
+            return report
+    
+    def _run(self, job_id: str, inference: Optional[str]):
+        job = self.jobs[job_id]
+        by_path = Counter()
+        after = None
+        try:
+            while True:
+                data_graph, after = self.fuseki.get_articles_graph_chunk(after, self.chunk_size)
+                if after is None:
+                    break
+                
+                articles = set(data_graph.subjects(RDF.type, SCHEMA.NewsArticle))
+                conforms, results_graph, _ = SHACLService.validate_rdf(data_graph, inference)
+                violations = [] if conforms else SHACLService.summarize_results(results_graph)
+                
+                with self.lock:
+                    job["articles_validated"] += len(articles)
+                    job["nonconforming_articles"] += len({v["focus_node"] for v in violations})
+                    by_path.update(v["path"] for v in violations)
+                    job["violations_by_path"] = dict(by_path)
+                    room = self.max_reported - len(job["violations"])
+                    job["violations"].extend(violations[:max(room, 0)])
+            
+            with self.lock:
+                job["status"] = "completed"
+        except Exception as e:
+            print(f"Dataset validation {job_id} failed: {e}")
+            with self.lock:
+                job["status"] = "failed"
+                job["error"] = str(e)
+        finally:
+            with self.lock:
+                job["finished_at"] = datetime.utcnow().isoformat() + "Z"
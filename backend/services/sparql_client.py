@@ -0,0 +1,124 @@
+import os
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional
+
+RDF_FORMATS = {
+    "turtle": "text/turtle",
+    "xml": "application/rdf+xml",
+    "n3": "text/n3, text/turtle",
+    "nt": "application/n-triples",
+}
+
+class SPARQLClient:
+    def __init__(self, pool_size: int = None, connect_timeout: float = None, read_timeout: float = None):
+        self.pool_size = pool_size or int(os.getenv("SPARQL_POOL_SIZE", "20"))
+        self.connect_timeout = connect_timeout or float(os.getenv("SPARQL_CONNECT_TIMEOUT", "5"))
+        self.read_timeout = read_timeout or float(os.getenv("SPARQL_READ_TIMEOUT", "30"))
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "WeP/1.0 (Web News Provenance)"})
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _timeout(self, timeout: Optional[float]):
+        return (self.connect_timeout, timeout or self.read_timeout)
+
+    def post_query(self, endpoint: str, query: str, accept: str, timeout: float = None, stream: bool = False) -> requests.Response:
+        response = self.session.post(
+            endpoint,
+            data={"query": query},
+            headers={"Accept": accept},
+            timeout=self._timeout(timeout),
+            stream=stream
+        )
+        response.raise_for_status()
+        return response
+
+    def query(self, endpoint: str, query: str, timeout: float = None) -> Dict[str, Any]:
+        response = self.post_query(endpoint, query, "application/sparql-results+json", timeout)
+        return response.json()
+
+    def construct(self, endpoint: str, query: str, format: str = "turtle", timeout: float = None) -> str:
+        accept = RDF_FORMATS.get(format, RDF_FORMATS["turtle"])
+        response = self.post_query(endpoint, query, accept, timeout)
+        response.encoding = "utf-8"
+        return response.text
+
+    def update(self, endpoint: str, update_query: str, auth=None, timeout: float = None) -> bool:
+        response = self.session.post(
+            endpoint,
+            data=update_query.encode("utf-8"),
+            headers={"Content-Type": "application/sparql-update"},
+            auth=auth,
+            timeout=self._timeout(timeout)
+        )
+        return response.status_code in [200, 201, 204]
+
+    def ping(self, url: str, timeout: float = 5) -> bool:
+        try:
+            response = self.session.get(url, timeout=(self.connect_timeout, timeout))
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncSPARQLClient:
+    def __init__(self, pool_size: int = None, connect_timeout: float = None, read_timeout: float = None):
+        self.pool_size = pool_size or int(os.getenv("SPARQL_POOL_SIZE", "20"))
+        self.connect_timeout = connect_timeout or float(os.getenv("SPARQL_CONNECT_TIMEOUT", "5"))
+        self.read_timeout = read_timeout or float(os.getenv("SPARQL_READ_TIMEOUT", "30"))
+
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": "WeP/1.0 (Web News Provenance)"},
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        )
+
+    def _timeout(self, timeout: Optional[float]):
+        return httpx.Timeout(timeout or self.read_timeout, connect=self.connect_timeout)
+
+    async def post_query(self, endpoint: str, query: str, accept: str, timeout: float = None) -> httpx.Response:
+        response = await self.client.post(
+            endpoint,
+            data={"query": query},
+            headers={"Accept": accept},
+            timeout=self._timeout(timeout)
+        )
+        response.raise_for_status()
+        return response
+
+    async def query(self, endpoint: str, query: str, timeout: float = None) -> Dict[str, Any]:
+        response = await self.post_query(endpoint, query, "application/sparql-results+json", timeout)
+        return response.json()
+
+    async def construct(self, endpoint: str, query: str, format: str = "turtle", timeout: float = None) -> str:
+        accept = RDF_FORMATS.get(format, RDF_FORMATS["turtle"])
+        response = await self.post_query(endpoint, query, accept, timeout)
+        response.encoding = "utf-8"
+        return response.text
+
+    async def update(self, endpoint: str, update_query: str, auth=None, timeout: float = None) -> bool:
+        response = await self.client.post(
+            endpoint,
+            content=update_query.encode("utf-8"),
+            headers={"Content-Type": "application/sparql-update"},
+            auth=auth,
+            timeout=self._timeout(timeout)
+        )
+        return response.status_code in [200, 201, 204]
+
+    async def ping(self, url: str, timeout: float = 5) -> bool:
+        try:
+            response = await self.client.get(url, timeout=httpx.Timeout(timeout, connect=self.connect_timeout))
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from rdflib.plugins.sparql.parser import parseQuery
+from rdflib.plugins.sparql.algebra import translateQuery
+
+from services.metrics_service import metrics
+
+# strings and IRIs are kept verbatim, comments dropped and any other whitespace run collapsed
+QUERY_TOKENS = re.compile(
+    r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|<[^<>"\s]*>)|#[^\n]*|\s+'
+)
+TOP_LIMIT = re.compile(r"\bLIMIT\s+\d+", re.IGNORECASE)
+QUERY_FORMS = {"SelectQuery": "select", "AskQuery": "ask", "ConstructQuery": "construct", "DescribeQuery": "construct"}
+RESULTS_MEDIA_TYPE = "application/sparql-results+json"
+TRIPLES_MEDIA_TYPE = "application/n-triples"
+FLUSH_BYTES = 65536
+
+class SPARQLProxy:
+    def __init__(self, fuseki_service, max_rows: int = None, timeout: float = None,
+                 max_bytes: int = None, cache_bytes: int = None):
+        self.fuseki = fuseki_service
+        self.storage = fuseki_service.storage
+        self.max_rows = max_rows or int(os.getenv("SPARQL_PROXY_MAX_ROWS", "10000"))
+        self.timeout = timeout or float(os.getenv("SPARQL_PROXY_TIMEOUT", "30"))
+        self.max_bytes = max_bytes or int(os.getenv("SPARQL_PROXY_MAX_BYTES", "10485760"))
+        self.cache_bytes = cache_bytes if cache_bytes is not None else int(os.getenv("SPARQL_PROXY_CACHE_BYTES", "67108864"))
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.cached_bytes = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return QUERY_TOKENS.sub(lambda m: m.group(1) or " ", query).strip()
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def plan(normalized: str, max_rows: int) -> Tuple[str, str]:
+        try:
+            algebra = translateQuery(parseQuery(normalized)).algebra
+        except Exception as e:
+            raise ValueError(f"Only SPARQL SELECT, ASK, CONSTRUCT and DESCRIBE queries are accepted: {e}")
+
+        form = QUERY_FORMS.get(algebra.name)
+        if form is None:
+            raise ValueError(f"Unsupported query form: {algebra.name}")
+        if form != "select":
+            # CONSTRUCT limits count solutions rather than triples, the triple stream is capped instead
+            return form, normalized
+
+        # one row over the cap is enough to tell a complete result from a truncated one
+        modifier = algebra.p
+        if modifier is not None and modifier.name == "Slice" and modifier.length is not None:
+            if modifier.length <= max_rows:
+                return form, normalized
+            # the outer LIMIT always follows any subquery LIMIT in the text
+            head, _, tail = normalized.rpartition(TOP_LIMIT.findall(normalized)[-1])
+            limited = f"{head}LIMIT {max_rows + 1}{tail}"
+        else:
+            limited = f"{normalized} LIMIT {max_rows + 1}"
+        try:
+            parseQuery(limited)
+            return form, limited
+        except Exception:
+            # e.g. a trailing VALUES block cannot be followed by LIMIT, the stream cap still applies
+            return form, normalized
+
+    def _cache_get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] != self.fuseki.write_generation:
+                self._evict(key)
+                entry = None
+            if entry is None:
+                metrics.inc("wep_cache_misses_total", cache="sparql")
+                return None
+            self.entries.move_to_end(key)
+        metrics.inc("wep_cache_hits_total", cache="sparql")
+        return entry[1], entry[2]
+
+    def _cache_set(self, key: str, generation: int, body: bytes, media_type: str):
+        if len(body) > self.cache_bytes:
+            return
+        with self.lock:
+            # a write landed while the query ran, the result may predate it
+            if generation != self.fuseki.write_generation:
+                return
+            self._evict(key)
+            self.entries[key] = (generation, body, media_type)
+            self.cached_bytes += len(body)
+            while self.cached_bytes > self.cache_bytes:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.cached_bytes -= len(entry[1])
+
+    def execute(self, query: str) -> Tuple[Iterator[bytes], str]:
+        normalized = self.normalize(query)
+        if not normalized:
+            raise ValueError("Query must not be empty")
+        form, planned = self.plan(normalized, self.max_rows)
+
+        key = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        cached = self._cache_get(key)
+        if cached is not None:
+            return iter([cached[0]]), cached[1]
+
+        generation = self.fuseki.write_generation
+        started = time.monotonic()
+        with self.fuseki._timer("sparql_proxy"):
+            if form == "select":
+                variables, bindings = self.storage.select_bindings(planned, self.timeout)
+                chunks = self._stream_select(variables, bindings, started)
+                media_type = RESULTS_MEDIA_TYPE
+            elif form == "ask":
+                body = json.dumps(self.storage.query(planned, self.timeout)).encode("utf-8")
+                chunks = iter([body])
+                media_type = RESULTS_MEDIA_TYPE
+            else:
+                lines = self.storage.construct_lines(planned, self.timeout)
+                chunks = self._stream_triples(lines, started)
+                media_type = TRIPLES_MEDIA_TYPE
+        return self._caching(chunks, key, generation, media_type), media_type
+
+    def _caching(self, chunks: Iterator[bytes], key: str, generation: int, media_type: str) -> Iterator[bytes]:
+        body = []
+        complete = True
+        for chunk in chunks:
+            if chunk is None:
+                # timeouts depend on load rather than on the query, so those results are not cached
+                complete = False
+                continue
+            body.append(chunk)
+            yield chunk
+        if complete:
+            self._cache_set(key, generation, b"".join(body), media_type)
+
+    def _stream_select(self, variables: List[str], bindings: Iterator[Dict], started: float) -> Iterator[bytes]:
+        head = b'{"head":{"vars":' + json.dumps(variables).encode("utf-8") + b'},"results":{"bindings":['
+        buffer = [head]
+        buffered = size = len(head)
+        rows = 0
+        reason = None
+        try:
+            for binding in bindings:
+                if rows >= self.max_rows:
+                    reason = "rows"
+                    break
+                if time.monotonic() - started > self.timeout:
+                    reason = "timeout"
+                    break
+                chunk = (b"," if rows else b"") + json.dumps(binding, ensure_ascii=False).encode("utf-8")
+                if size + len(chunk) > self.max_bytes:
+                    reason = "bytes"
+                    break
+                buffer.append(chunk)
+                buffered += len(chunk)
+                size += len(chunk)
+                rows += 1
+                if buffered >= FLUSH_BYTES:
+                    yield b"".join(buffer)
+                    buffer = []
+                    buffered = 0
+        finally:
+            if hasattr(bindings, "close"):
+                bindings.close()
+
+        tail = {"truncated": reason is not None, "limit_reason": reason, "row_count": rows}
+        buffer.append(b"]}," + json.dumps(tail)[1:].encode("utf-8"))
+        yield b"".join(buffer)
+        if reason == "timeout":
+            yield None
+
+    def _stream_triples(self, lines: Iterator[str], started: float) -> Iterator[bytes]:
+        buffer = []
+        buffered = size = 0
+        rows = 0
+        timed_out = False
+        try:
+            for line in lines:
+                if not line.strip():
+                    continue
+                if rows >= self.max_rows:
+                    break
+                if time.monotonic() - started > self.timeout:
+                    timed_out = True
+                    break
+                chunk = (line if line.endswith("\n") else line + "\n").encode("utf-8")
+                if size + len(chunk) > self.max_bytes:
+                    break
+                buffer.append(chunk)
+                buffered += len(chunk)
+                size += len(chunk)
+                rows += 1
+                if buffered >= FLUSH_BYTES:
+                    yield b"".join(buffer)
+                    buffer = []
+                    buffered = 0
+        finally:
+            # stops reading the upstream response once a cap is hit
+            if hasattr(lines, "close"):
+                lines.close()
+        yield b"".join(buffer)
+        if timed_out:
+            yield None
@@ -0,0 +1,56 @@
+import threading
+from collections import Counter
+from typing import Dict
+
+class StatisticsIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built = False
+        self.total_articles = 0
+        self.authors = Counter()
+        self.languages = Counter()
+        self.keywords = Counter()
+
+    def build(self, tables: Dict):
+        with self.lock:
+            self.total_articles = tables["total_articles"]
+            self.authors = Counter(tables["authors"])
+            self.languages = Counter(tables["languages"])
+            self.keywords = Counter(tables["keywords"])
+            self.built = True
+
+    def rebuild(self, fuseki_service):
+        self.build(fuseki_service.get_statistics_tables())
+
+    def add_article(self, article: Dict):
+        with self.lock:
+            self.total_articles += 1
+            self.authors[article["author"]] += 1
+            self.languages[article["language"]] += 1
+            self.keywords.update(set(article.get("keywords") or []))
+
+    def remove_article(self, article: Dict):
+        with self.lock:
+            self.total_articles = max(0, self.total_articles - 1)
+            self.authors.subtract([article["author"]])
+            self.languages.subtract([article["language"]])
+            self.keywords.subtract(set(article.get("keywords") or []))
+            for counter in (self.authors, self.languages, self.keywords):
+                for key in [key for key, count in counter.items() if count <= 0]:
+                    del counter[key]
+
+    def snapshot(self, top_keywords: int = 10) -> Dict:
+        with self.lock:
+            return {
+                "total_articles": self.total_articles,
+                "total_authors": len(self.authors),
+                "articles_by_language": [
+                    {"language": language, "count": str(count)}
+                    for language, count in self.languages.items()
+                ],
+                "top_keywords": [
+                    {"keyword": keyword, "count": str(count)}
+                    for keyword, count in self.keywords.most_common(top_keywords)
+                ]
+            }
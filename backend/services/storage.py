@@ -0,0 +1,391 @@
+import os
+import io
+import re
+import csv
+import json
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from requests.auth import HTTPBasicAuth
+from rdflib import Dataset, URIRef, BNode, Literal
+from typing import Dict, Any, Iterator, List, Tuple
+
+from services.sparql_client import SPARQLClient, AsyncSPARQLClient
+from services.export_service import nt_term
+
+JOURNAL_SEGMENT = re.compile(r"^journal-(\d+)\.jsonl$")
+INSERT_DATA = re.compile(r"^(?P<prefixes>(?:\s*PREFIX[^\n]*\n)*)\s*INSERT DATA\s*\{(?P<triples>.*)\}\s*$", re.DOTALL)
+TSV_LITERAL = re.compile(r'^"(?P<value>.*)"(?:@(?P<lang>[A-Za-z0-9-]+)|\^\^<(?P<datatype>[^>]*)>)?$', re.DOTALL)
+TSV_ESCAPE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+TSV_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f"}
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+def _unescape(value: str) -> str:
+    def replace(match):
+        code = match.group(1) or match.group(2)
+        if code:
+            return chr(int(code, 16))
+        return TSV_ESCAPES.get(match.group(3), match.group(3))
+    return TSV_ESCAPE.sub(replace, value)
+
+def parse_tsv_term(term: str) -> Dict[str, str]:
+    if term.startswith("<") and term.endswith(">"):
+        return {"type": "uri", "value": term[1:-1]}
+    if term.startswith("_:"):
+        return {"type": "bnode", "value": term[2:]}
+    match = TSV_LITERAL.match(term)
+    if match:
+        binding = {"type": "literal", "value": _unescape(match.group("value"))}
+        if match.group("lang"):
+            binding["xml:lang"] = match.group("lang")
+        elif match.group("datatype"):
+            binding["datatype"] = match.group("datatype")
+        return binding
+    if term in ("true", "false"):
+        return {"type": "literal", "value": term, "datatype": XSD + "boolean"}
+    if re.match(r"^[+-]?\d+$", term):
+        return {"type": "literal", "value": term, "datatype": XSD + "integer"}
+    if "e" in term.lower():
+        return {"type": "literal", "value": term, "datatype": XSD + "double"}
+    return {"type": "literal", "value": term, "datatype": XSD + "decimal"}
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def query(self, query: str, timeout: float = None) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def select_rows(self, query: str) -> Iterator[Dict[str, str]]:
+        pass
+
+    @abstractmethod
+    def select_bindings(self, query: str, timeout: float = None) -> Tuple[List[str], Iterator[Dict[str, Dict]]]:
+        pass
+
+    @abstractmethod
+    def construct(self, query: str, format: str = "turtle", timeout: float = None) -> str:
+        pass
+
+    @abstractmethod
+    def construct_lines(self, query: str, timeout: float = None) -> Iterator[str]:
+        pass
+
+    @abstractmethod
+    def update(self, update_query: str, timeout: float = None) -> bool:
+        pass
+
+    @abstractmethod
+    def ping(self) -> bool:
+        pass
+
+    def close(self):
+        pass
+
+class FusekiStorage(StorageBackend):
+    def __init__(self, fuseki_url: str, client: SPARQLClient = None):
+        self.base_url = fuseki_url
+        self.dataset = "news-provenance"
+        self.sparql_endpoint = f"{fuseki_url}/{self.dataset}/sparql"
+        self.update_endpoint = f"{fuseki_url}/{self.dataset}/update"
+        self.username = os.getenv("FUSEKI_USERNAME", "admin")
+        self.password = os.getenv("FUSEKI_PASSWORD", "admin123")
+        self.auth = HTTPBasicAuth(self.username, self.password)
+        self.client = client or SPARQLClient()
+
+    def query(self, query: str, timeout: float = None) -> Dict[str, Any]:
+        return self.client.query(self.sparql_endpoint, query, timeout)
+
+    def select_rows(self, query: str) -> Iterator[Dict[str, str]]:
+        response = self.client.post_query(self.sparql_endpoint, query, "text/csv", stream=True)
+        response.raw.decode_content = True
+        return self._read_csv(response)
+
+    @staticmethod
+    def _read_csv(response) -> Iterator[Dict[str, str]]:
+        try:
+            reader = csv.DictReader(io.TextIOWrapper(response.raw, encoding="utf-8", newline=""))
+            for row in reader:
+                yield {k: v for k, v in row.items() if v != ""}
+        finally:
+            response.close()
+
+    def select_bindings(self, query: str, timeout: float = None) -> Tuple[List[str], Iterator[Dict[str, Dict]]]:
+        response = self.client.post_query(
+            self.sparql_endpoint, query, "text/tab-separated-values", timeout=timeout, stream=True
+        )
+        response.raw.decode_content = True
+        lines = io.TextIOWrapper(response.raw, encoding="utf-8", newline="\n")
+        header = lines.readline().rstrip("\n")
+        variables = [var.lstrip("?$") for var in header.split("\t")] if header else []
+        return variables, self._read_tsv(response, lines, variables)
+
+    @staticmethod
+    def _read_tsv(response, lines, variables: List[str]) -> Iterator[Dict[str, Dict]]:
+        try:
+            for line in lines:
+                line = line.rstrip("\n")
+                if not line and len(variables) != 1:
+                    continue
+                yield {
+                    var: parse_tsv_term(term)
+                    for var, term in zip(variables, line.split("\t")) if term
+                }
+        finally:
+            response.close()
+
+    def construct(self, query: str, format: str = "turtle", timeout: float = None) -> str:
+        return self.client.construct(self.sparql_endpoint, query, format, timeout)
+
+    def construct_lines(self, query: str, timeout: float = None) -> Iterator[str]:
+        response = self.client.post_query(
+            self.sparql_endpoint, query, "application/n-triples", timeout=timeout, stream=True
+        )
+        response.raw.decode_content = True
+        return self._read_lines(response)
+
+    @staticmethod
+    def _read_lines(response) -> Iterator[str]:
+        try:
+            yield from io.TextIOWrapper(response.raw, encoding="utf-8", newline="\n")
+        finally:
+            response.close()
+
+    def update(self, update_query: str, timeout: float = None) -> bool:
+        return self.client.update(self.update_endpoint, update_query, auth=self.auth, timeout=timeout)
+
+    def ping(self) -> bool:
+        return self.client.ping(f"{self.base_url}/$/ping")
+
+class EmbeddedStorage(StorageBackend):
+    def __init__(self, path: str = None, compact_every: int = None):
+        self.path = path or os.getenv("EMBEDDED_STORE_PATH", "data/store")
+        self.compact_every = compact_every or int(os.getenv("EMBEDDED_COMPACT_EVERY", "1000"))
+        self.lock = threading.RLock()
+        self.dataset = Dataset(default_union=True)
+        self.journal = None
+        self.journal_entries = 0
+        self.segment = 0
+        self.compaction = None
+
+        if self.path != ":memory:":
+            os.makedirs(self.path, exist_ok=True)
+            self.snapshot_path = os.path.join(self.path, "snapshot.nq")
+            self.journal_path = os.path.join(self.path, "journal.jsonl")
+            self._load()
+            self.journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"journal-{segment}.jsonl")
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(match.group(1)) for match in map(JOURNAL_SEGMENT.match, os.listdir(self.path)) if match
+        )
+
+    def _replay(self, journal_path: str) -> int:
+        entries = 0
+        with open(journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                    entries += 1
+                except Exception as e:
+                    print(f"Skipping unreadable journal entry: {e}")
+        return entries
+
+    def _load(self):
+        # the snapshot's first line names the last journal segment it already contains
+        covered = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                header = f.readline().split()
+            if header[:2] == ["#", "journal"]:
+                covered = int(header[2])
+            self.dataset.parse(self.snapshot_path, format="nquads")
+        # segments left over from a compaction that did not finish
+        for segment in self._segments():
+            if segment > covered:
+                self._replay(self._segment_path(segment))
+            self.segment = max(self.segment, segment)
+        self.segment = max(self.segment, covered)
+        if os.path.exists(self.journal_path):
+            self.journal_entries = self._replay(self.journal_path)
+        print(f"Embedded store loaded {len(self.dataset)} triples from {self.path}")
+
+    def _apply(self, update_query: str):
+        # INSERT DATA bodies are plain Turtle, or TriG when they name graphs, both of which
+        # parse far faster than a SPARQL update
+        match = INSERT_DATA.match(update_query)
+        if match and "GRAPH" not in match.group("triples"):
+            self.dataset.default_context.parse(
+                data=match.group("prefixes") + match.group("triples"), format="turtle"
+            )
+        elif match:
+            self.dataset.parse(
+                data=match.group("prefixes") + match.group("triples"), format="trig",
+                publicID=self.dataset.default_context.identifier
+            )
+        else:
+            self.dataset.update(update_query)
+
+    @staticmethod
+    def _term(term) -> Dict[str, str]:
+        if isinstance(term, URIRef):
+            return {"type": "uri", "value": str(term)}
+        if isinstance(term, BNode):
+            return {"type": "bnode", "value": str(term)}
+        binding = {"type": "literal", "value": str(term)}
+        if isinstance(term, Literal):
+            if term.language:
+                binding["xml:lang"] = term.language
+            elif term.datatype:
+                binding["datatype"] = str(term.datatype)
+        return binding
+
+    def query(self, query: str, timeout: float = None) -> Dict[str, Any]:
+        with self.lock:
+            result = self.dataset.query(query)
+            if result.type == "ASK":
+                return {"head": {}, "boolean": bool(result.askAnswer)}
+            variables = [str(var) for var in result.vars]
+            bindings = [
+                {str(var): self._term(row[var]) for var in result.vars if row[var] is not None}
+                for row in result
+            ]
+        return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+    def select_rows(self, query: str) -> Iterator[Dict[str, str]]:
+        with self.lock:
+            result = self.dataset.query(query)
+            rows = [
+                {str(var): str(row[var]) for var in result.vars if row[var] is not None}
+                for row in result
+            ]
+        return iter(rows)
+
+    def select_bindings(self, query: str, timeout: float = None) -> Tuple[List[str], Iterator[Dict[str, Dict]]]:
+        result = self.query(query, timeout)
+        return result["head"].get("vars", []), iter(result["results"]["bindings"])
+
+    def construct(self, query: str, format: str = "turtle", timeout: float = None) -> str:
+        with self.lock:
+            graph = self.dataset.query(query).graph
+            # rdflib serializes an empty graph as a bare newline, Fuseki answers with nothing
+            if len(graph) == 0:
+                return ""
+            return graph.serialize(format=format)
+
+    def construct_lines(self, query: str, timeout: float = None) -> Iterator[str]:
+        # rdflib builds the whole result graph, only its serialization is lazy
+        with self.lock:
+            graph = self.dataset.query(query).graph
+        return (
+            f"{nt_term(self._term(s))} {nt_term(self._term(p))} {nt_term(self._term(o))} .\n"
+            for s, p, o in graph
+        )
+
+    def update(self, update_query: str, timeout: float = None) -> bool:
+        with self.lock:
+            self._apply(update_query)
+            if self.journal:
+                self.journal.write(json.dumps(update_query) + "\n")
+                self.journal.flush()
+                self.journal_entries += 1
+                if self.journal_entries >= self.compact_every and not self._compacting():
+                    quads, segment = self._rotate()
+                    self.compaction = threading.Thread(
+                        target=self._write_snapshot, args=(quads, segment), name="embedded-compaction", daemon=True
+                    )
+                    self.compaction.start()
+        return True
+
+    def _compacting(self) -> bool:
+        return self.compaction is not None and self.compaction.is_alive()
+
+    def _rotate(self) -> Tuple[List, int]:
+        # copying the quads is far cheaper than serializing them, which happens off the lock
+        quads = list(self.dataset.quads((None, None, None, None)))
+        self.journal.close()
+        self.segment += 1
+        os.replace(self.journal_path, self._segment_path(self.segment))
+        self.journal = open(self.journal_path, "w", encoding="utf-8")
+        self.journal_entries = 0
+        return quads, self.segment
+
+    def _write_snapshot(self, quads: List, segment: int):
+        default_graph = self.dataset.default_context.identifier
+        temp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(f"# journal {segment}\n")
+                for s, p, o, g in quads:
+                    graph = "" if g == default_graph else f" {nt_term(self._term(g))}"
+                    f.write(f"{nt_term(self._term(s))} {nt_term(self._term(p))} {nt_term(self._term(o))}{graph} .\n")
+            os.replace(temp_path, self.snapshot_path)
+            for old_segment in self._segments():
+                if old_segment <= segment:
+                    os.remove(self._segment_path(old_segment))
+        except Exception as e:
+            # the rotated segments stay on disk and are replayed on the next load
+            print(f"Embedded store compaction failed: {e}")
+
+    def compact(self):
+        with self.lock:
+            if not self.journal:
+                return
+            if self.compaction is not None:
+                self.compaction.join()
+            quads, segment = self._rotate()
+            self._write_snapshot(quads, segment)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.dataset)
+
+    def ping(self) -> bool:
+        return True
+
+    def close(self):
+        with self.lock:
+            if self.journal:
+                self.compact()
+                self.journal.close()
+                self.journal = None
+
+class AsyncFusekiStorage:
+    def __init__(self, storage: FusekiStorage, client: AsyncSPARQLClient = None):
+        self.storage = storage
+        self.client = client or AsyncSPARQLClient()
+
+    async def query(self, query: str, timeout: float = None) -> Dict[str, Any]:
+        return await self.client.query(self.storage.sparql_endpoint, query, timeout)
+
+    async def construct(self, query: str, format: str = "turtle", timeout: float = None) -> str:
+        return await self.client.construct(self.storage.sparql_endpoint, query, format, timeout)
+
+    async def ping(self) -> bool:
+        return await self.client.ping(f"{self.storage.base_url}/$/ping")
+
+class AsyncEmbeddedStorage:
+    def __init__(self, storage: EmbeddedStorage):
+        self.storage = storage
+
+    async def query(self, query: str, timeout: float = None) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.storage.query, query, timeout)
+
+    async def construct(self, query: str, format: str = "turtle", timeout: float = None) -> str:
+        return await asyncio.to_thread(self.storage.construct, query, format, timeout)
+
+    async def ping(self) -> bool:
+        return True
+
+def create_storage(fuseki_url: str, client: SPARQLClient = None,
+                   async_client: AsyncSPARQLClient = None, backend: str = None) -> Tuple[StorageBackend, Any]:
+    backend = backend or os.getenv("STORAGE_BACKEND", "fuseki")
+    if backend == "embedded":
+        storage = EmbeddedStorage()
+        return storage, AsyncEmbeddedStorage(storage)
+    if backend == "fuseki":
+        storage = FusekiStorage(fuseki_url, client)
+        return storage, AsyncFusekiStorage(storage, async_client)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -24,9 +24,10 @@ function ArticleDetail() {
         const articleRes = await axios.get(`${API_URL}/api/articles/${id}`);
         setArticle(articleRes.data);
         
-        const [provRes, qrRes, jsonldRes, recRes, valRes, rdfRes] = await Promise.allSettled([
+        setQrCode(`${API_URL}/api/articles/${id}/qrcode?format=svg`);
+        
+        const [provRes, jsonldRes, recRes, valRes, rdfRes] = await Promise.allSettled([
           axios.get(`${API_URL}/api/provenance/${id}`),
-          axios.get(`${API_URL}/api/articles/${id}/qrcode`),
           axios.get(`${API_URL}/api/articles/${id}/jsonld`),
           axios.get(`${API_URL}/api/articles/${id}/recommendations`),
           axios.get(`${API_URL}/api/articles/${id}/validate`),
@@ -34,7 +35,6 @@ function ArticleDetail() {
         ]);
         
         if (provRes.status === 'fulfilled') setProvenance(provRes.value.data);
-        if (qrRes.status === 'fulfilled') setQrCode(qrRes.value.data.qr_code);
         if (jsonldRes.status === 'fulfilled') setJsonld(jsonldRes.value.data);
         if (recRes.status === 'fulfilled') setRecommendations(recRes.value.data.recommendations);
         if (valRes.status === 'fulfilled') setValidation(valRes.value.data);